@@ -0,0 +1,236 @@
+
+# Versioned JSON API for kiosk and mobile clients, mounted at /api/v1 by view.py.
+# Same session login as the HTML pages (POST /api/v1/login), same controller
+# functions underneath.  List endpoints take ?after=&limit= like the pages do
+# and return {"items": [...], "next": cursor or null}; every endpoint accepts
+# ?fields=a,b to return only those keys of each record.  POST /applications
+# takes an Idempotency-Key header: a retry with the same key gets the first
+# response again, and a client applying too fast gets 429 with Retry-After.
+#
+# Bodies are serialized with orjson when it is installed (json otherwise) and
+# compressed with brotli or gzip, whichever the client's Accept-Encoding
+# prefers, once they are big enough to be worth it.
+import gzip
+import json
+import math
+
+from flask import Blueprint, Response, g, request, session
+import controller
+import metrics
+import model
+
+try:
+    import orjson
+except ImportError:  # optional: faster serializer
+    orjson = None
+try:
+    import brotli
+except ImportError:  # optional: br content-encoding
+    brotli = None
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+# ---------- Serialization ----------
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def compress(body: bytes):
+    """(body, content-encoding or None) as negotiated from Accept-Encoding"""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+    return body, None
+
+def json_response(payload, status: int = 200) -> Response:
+    with metrics.timer("api.serialize"):
+        body, encoding = compress(dumps(payload))
+    resp = Response(body, status=status, mimetype="application/json")
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+def error(message: str, status: int) -> Response:
+    return json_response({"error": message}, status)
+
+# ---------- Field selection ----------
+def requested_fields():
+    """Set of field names from ?fields=, or None for all fields."""
+    raw = request.args.get("fields", "")
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    return fields or None
+
+def select(row: dict, fields) -> dict:
+    if fields is None:
+        return dict(row)
+    return {k: v for k, v in row.items() if k in fields}
+
+def listing(rows, next_cursor) -> Response:
+    fields = requested_fields()
+    return json_response({"items": [select(r, fields) for r in rows], "next": next_cursor})
+
+def request_data():
+    """The JSON object (or form) sent with the request; None if the body is
+    declared JSON but is malformed or not an object."""
+    if not request.is_json:
+        return request.form
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def text_fields(data, *names):
+    """The named fields as stripped text (see controller.text_field), or None
+    if any of them has a value of the wrong type."""
+    values = [controller.text_field(data.get(n)) for n in names]
+    return None if None in values else values
+
+# ---------- Auth ----------
+def _require_login():
+    if g.get("user") is None:
+        return error("กรุณาเข้าสู่ระบบ", 401)
+    return None
+
+def _require_admin():
+    denied = _require_login()
+    if denied:
+        return denied
+    if g.user.get("role","").upper() != "ADMIN":
+        return error("ต้องเป็นแอดมินเท่านั้น", 403)
+    return None
+
+def _job_out(job: dict) -> dict:
+    names = controller.company_names()
+    return {**job, "company": names.get(job.get("company_id",""), "")}
+
+# ---------- Endpoints ----------
+@bp.route("/login", methods=["POST"])
+def login():
+    data = request_data()
+    fields = text_fields(data, "candidate_id", "email") if data is not None else None
+    if fields is None:
+        return error("ข้อมูลเข้าสู่ระบบไม่ถูกต้อง", 400)
+    candidate_id, email = fields[0], fields[1].lower()
+    if not model.is_valid_8digit_not0(candidate_id) or not model.is_valid_email(email):
+        return error("ข้อมูลเข้าสู่ระบบไม่ถูกต้อง", 400)
+    user, err = controller.login(candidate_id, email)
+    if err:
+        return error(err, 401)
+    session.clear()
+    session["candidate_id"] = user["candidate_id"]
+    session["role"] = user.get("role","")
+    return json_response(select(user, requested_fields()))
+
+@bp.route("/logout", methods=["POST"])
+def logout():
+    session.clear()
+    return json_response({"ok": True})
+
+@bp.route("/jobs")
+def jobs():
+    denied = _require_login()
+    if denied: return denied
+    after, limit = controller.page_args(request.args)
+    q = controller.normalize_query(request.args.get("q"))
+    if q:
+        rows, next_cursor = controller.search_open_jobs(q, after=after, limit=limit)
+    else:
+        rows, next_cursor = controller.page_open_jobs(request.args.get("sort","title"),
+                                                      after=after, limit=limit)
+    return listing([_job_out(j) for j in rows], next_cursor)
+
+@bp.route("/jobs/<job_id>")
+def job(job_id):
+    denied = _require_login()
+    if denied: return denied
+    job = model.get_job(job_id)
+    if not job:
+        return error("ไม่พบตำแหน่งงาน", 404)
+    return json_response(select(_job_out(job), requested_fields()))
+
+@bp.route("/applications", methods=["POST"])
+def apply():
+    denied = _require_login()
+    if denied: return denied
+    data = request_data()
+    fields = text_fields(data, "job_id", "idempotency_key") if data is not None else None
+    if fields is None:
+        return error("ข้อมูลไม่ถูกต้อง", 400)
+    job_id, key = fields
+    if not job_id:
+        return error("ข้อมูลไม่ถูกต้อง", 400)
+    key = request.headers.get("Idempotency-Key") or key
+    ok, msg, retry_after = controller.submit_application(job_id, g.user["candidate_id"], key)
+    if retry_after:
+        resp = error(msg, 429)
+        resp.headers["Retry-After"] = str(math.ceil(retry_after))
+        return resp
+    if not ok:
+        return error(msg, 409)
+    return json_response({"ok": True, "message": msg}, 201)
+
+def _candidate(candidate_id: str) -> Response:
+    cand = model.get_candidate(candidate_id)
+    if not cand:
+        return error("ไม่พบผู้สมัคร", 404)
+    return json_response(select(cand, requested_fields()))
+
+def _applications(candidate_id: str) -> Response:
+    after, limit = controller.page_args(request.args)
+    _, apps, next_cursor, err = controller.candidate_profile_page(
+        candidate_id, sort_by=request.args.get("sort","title"), after=after, limit=limit)
+    if err:
+        return error(err, 404)
+    return listing(apps, next_cursor)
+
+@bp.route("/me")
+def me():
+    denied = _require_login()
+    if denied: return denied
+    return _candidate(g.user["candidate_id"])
+
+@bp.route("/me/applications")
+def my_applications():
+    denied = _require_login()
+    if denied: return denied
+    return _applications(g.user["candidate_id"])
+
+# ---------- Admin ----------
+@bp.route("/admin/candidates")
+def admin_candidates():
+    denied = _require_admin()
+    if denied: return denied
+    after, limit = controller.page_args(request.args)
+    rows, next_cursor = controller.page_candidates(request.args.get("sort","first_name"),
+                                                   after=after, limit=limit)
+    return listing(rows, next_cursor)
+
+@bp.route("/admin/candidates/<candidate_id>")
+def admin_candidate(candidate_id):
+    denied = _require_admin()
+    if denied: return denied
+    return _candidate(candidate_id)
+
+@bp.route("/admin/candidates/<candidate_id>/applications")
+def admin_candidate_applications(candidate_id):
+    denied = _require_admin()
+    if denied: return denied
+    return _applications(candidate_id)
+
+@bp.route("/admin/counts")
+def admin_counts():
+    denied = _require_admin()
+    if denied: return denied
+    return listing(controller.admin_counts_by_job(), None)
@@ -0,0 +1,145 @@
+
+# ASGI entry point for the Job Fair app:
+#   uvicorn asgi:app --host 0.0.0.0 --port 8000
+#   hypercorn asgi:app --bind 0.0.0.0:8000
+# The event loop owns the sockets (keep-alive, slow clients, request bodies)
+# while the Flask views, and the blocking CSV/SQLite I/O they do, run on a
+# bounded thread pool of JOBFAIR_WORKER_THREADS threads.  Response bodies are
+# streamed back chunk by chunk, so streamed pages stay streamed, and a client
+# that disconnects stops the stream (an export then frees its pool thread at
+# the next chunk instead of running to the end).
+#
+# The bridge is hand-rolled rather than asgiref's WsgiToAsgi or a2wsgi since
+# neither is a dependency here; it is small enough to own.
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import scheduler
+from view import app as flask_app
+
+WORKER_THREADS = int(os.environ.get("JOBFAIR_WORKER_THREADS", "16"))
+
+_pool = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="jobfair-wsgi")
+
+def _environ(scope, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            continue
+        else:
+            key = "HTTP_" + name
+            if key in environ:
+                # HTTP/2 sends each cookie as its own field; they join with "; "
+                sep = "; " if key == "HTTP_COOKIE" else ","
+                value = environ[key] + sep + value
+            environ[key] = value
+    return environ
+
+def _run_wsgi(environ, loop, send, disconnected: threading.Event):
+    """Runs on a pool thread: call Flask and push the response to the loop,
+    until the body ends or the client goes away."""
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+
+    def emit(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    def begin():
+        status, headers = started
+        emit({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+
+    body = flask_app(environ, start_response)
+    try:
+        head_sent = False
+        for chunk in body:
+            if disconnected.is_set():
+                return
+            if not chunk:
+                continue
+            if not head_sent:
+                begin()
+                head_sent = True
+            emit({"type": "http.response.body", "body": chunk, "more_body": True})
+        if not head_sent:
+            begin()
+        emit({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # deadline scheduler: one thread across the server's worker
+                # processes (see scheduler.start_singleton)
+                if scheduler.enabled():
+                    scheduler.start_singleton()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                _pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    environ = _environ(scope, b"".join(chunks))
+    loop = asyncio.get_running_loop()
+    disconnected = threading.Event()
+    watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+    try:
+        await loop.run_in_executor(_pool, _run_wsgi, environ, loop, send, disconnected)
+    finally:
+        disconnected.set()  # also stops the thread if this task is cancelled
+        watcher.cancel()
+
+async def _watch_disconnect(receive, disconnected: threading.Event):
+    # with the body read, the next message is http.disconnect
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
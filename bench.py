@@ -0,0 +1,130 @@
+
+# Benchmarks model/controller/view against generated data of a chosen size.
+#   python bench.py                       # small preset, CSV storage
+#   python bench.py --preset large --storage sqlite
+#   python bench.py --jobs 5000 --candidates 20000 --applications 100000 -n 200
+# Data is written to a temporary directory; the repo's CSVs are not touched.
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import seed_data
+
+PRESETS = {
+    "small":  dict(companies=20,   jobs=500,    candidates=2000,   applications=10000),
+    "medium": dict(companies=200,  jobs=5000,   candidates=50000,  applications=200000),
+    "large":  dict(companies=1000, jobs=50000,  candidates=200000, applications=1000000),
+}
+
+def timed(n, fn):
+    """Run fn(i) n times; returns per-call latencies in seconds."""
+    out = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        out.append(time.perf_counter() - t0)
+    return out
+
+def report(name, lat):
+    lat = sorted(lat)
+    p50 = lat[len(lat) // 2]
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    total = sum(lat)
+    rate = len(lat) / total if total else float("inf")
+    print(f"{name:<36} n={len(lat):<6} p50={p50*1000:9.3f}ms  p95={p95*1000:9.3f}ms  "
+          f"mean={statistics.fmean(lat)*1000:9.3f}ms  {rate:10.1f} ops/s")
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Job Fair benchmark")
+    p.add_argument("--preset", choices=PRESETS, default="small")
+    for field in ("companies", "jobs", "candidates", "applications"):
+        p.add_argument(f"--{field}", type=int, help="override the preset")
+    p.add_argument("--days", type=int, default=60)
+    p.add_argument("--skew", type=float, default=1.0)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--storage", choices=["csv", "sqlite"], default="csv")
+    p.add_argument("-n", "--iterations", type=int, default=100, help="calls per benchmark")
+    p.add_argument("--keep", action="store_true", help="keep the generated data directory")
+    args = p.parse_args(argv)
+
+    sizes = dict(PRESETS[args.preset])
+    for field in sizes:
+        if getattr(args, field) is not None:
+            sizes[field] = getattr(args, field)
+
+    data_dir = tempfile.mkdtemp(prefix="jobfair-bench-")
+    try:
+        run(args, sizes, data_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+def run(args, sizes, data_dir):
+    t0 = time.perf_counter()
+    seed_data.generate(data_dir, days=args.days, skew=args.skew, seed=args.seed, **sizes)
+    print(f"generated {sizes} in {time.perf_counter() - t0:.1f}s -> {data_dir}")
+
+    # model reads its paths at import time
+    os.environ["JOBFAIR_DATA_DIR"] = data_dir
+    os.environ["JOBFAIR_STORAGE"] = args.storage
+    import model
+    import controller
+    if args.storage == "sqlite":
+        t0 = time.perf_counter()
+        model.import_csv_to_sqlite()
+        print(f"imported into SQLite in {time.perf_counter() - t0:.1f}s")
+
+    rnd = random.Random(args.seed)
+    n = args.iterations
+    job_ids = [seed_data.gen_8digit(2000 + i) for i in range(1, sizes["jobs"] + 1)]
+    cand_ids = [seed_data.gen_8digit(3000 + i) for i in range(sizes["candidates"])]
+    admin_id = seed_data.gen_8digit(3000 + sizes["candidates"])
+
+    t0 = time.perf_counter()
+    model.get_job(job_ids[0])
+    model.list_applications_by_job(job_ids[0])
+    model.get_candidate(cand_ids[0])
+    print(f"cold load (first lookups): {time.perf_counter() - t0:.2f}s")
+    print()
+
+    report("model.get_job", timed(n, lambda i: model.get_job(rnd.choice(job_ids))))
+    report("model.list_applications_by_job",
+           timed(n, lambda i: model.list_applications_by_job(rnd.choice(job_ids))))
+    report("controller.admin_counts_by_job", timed(max(n // 10, 1), lambda i: controller.admin_counts_by_job()))
+    report("controller.candidate_profile",
+           timed(n, lambda i: controller.candidate_profile(rnd.choice(cand_ids), sort_by="company")))
+    report("controller.page_open_jobs",
+           timed(n, lambda i: controller.page_open_jobs(rnd.choice(controller.JOB_SORTS))))
+    report("controller.apply_job",
+           timed(n, lambda i: controller.apply_job(rnd.choice(job_ids), rnd.choice(cand_ids))))
+
+    try:
+        import view
+    except ImportError as e:
+        print(f"\nskipping Flask routes ({e})")
+        return
+    print()
+    client = view.app.test_client()
+    client.post("/login", data={"candidate_id": admin_id, "email": "admin.user@example.com"})
+    routes = [
+        ("GET /jobs", lambda i: "/jobs"),
+        ("GET /jobs?sort=company", lambda i: "/jobs?sort=company"),
+        ("GET /me", lambda i: "/me"),
+        ("GET /admin/candidates", lambda i: "/admin/candidates"),
+        ("GET /admin/candidate/<id>", lambda i: f"/admin/candidate/{rnd.choice(cand_ids)}"),
+    ]
+    for name, url in routes:
+        def hit(i, url=url):
+            r = client.get(url(i))
+            r.get_data()
+            if r.status_code != 200:
+                raise RuntimeError(f"{name}: HTTP {r.status_code}")
+        report(name, timed(n, hit))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,244 @@
 
-from datetime import datetime
-from typing import List, Dict
+import base64
+import bisect
+import itertools
+import json
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import model
+import search
+import throttle
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+USER_CACHE_SIZE = 4096
+SEARCH_CACHE_SIZE = 256
+MAX_QUERY_LENGTH = 200
+
+# relevance weight of a hit in the job title, company name and description
+JOB_SEARCH_WEIGHTS = (3.0, 2.0, 1.0)
+
+# applications per candidate: a burst of APPLY_BURST, then one per
+# 60/APPLY_RATE_PER_MINUTE seconds
+APPLY_RATE_PER_MINUTE = 10
+APPLY_BURST = 5
+# seconds a submission is remembered under its idempotency key
+IDEMPOTENCY_TTL = 600
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+
+JOB_SORTS = ("title", "company", "deadline")
+CANDIDATE_SORTS = ("first_name", "last_name", "email", "role")
+
+# ---------- Joins ----------
+# Company/job lookups are taken from model's id maps once per call, so sorting
+# or rendering N rows costs N dict hits rather than N table lookups.
+def join_apps(apps: List[Dict[str,str]]) -> List[Dict[str,str]]:
+    """Copy applications with the job "title" and "company" name filled in."""
+    jobs = model.job_map()
+    companies = model.company_map()
+    joined = []
+    for a in apps:
+        job = jobs.get(a.get("job_id","")) or {}
+        comp = companies.get(job.get("company_id","")) or {}
+        joined.append({**a, "title": job.get("title",""), "company": comp.get("name","")})
+    return joined
+
+def company_names() -> Dict[str,str]:
+    return model.cached("company_names", (model.COMPANIES_CSV,),
+                        lambda: {cid: c.get("name","") for cid, c in model.company_map().items()})
 
 # ---------- Sorting utilities ----------
+# Sort keys are tuples of strings ending in the row id, so they are unique and
+# can double as pagination cursors.
+def _candidate_key(by: str):
+    return lambda c: (c.get(by,"").lower(), c.get("candidate_id",""))
+
+def _job_key(by: str):
+    if by == "company":
+        names = company_names()
+        return lambda j: (names.get(j.get("company_id",""), "").lower(), j.get("title","").lower(), j.get("job_id",""))
+    if by == "deadline":
+        # parsed dates as ISO strings sort chronologically; unparseable ones go last
+        deadlines = model.job_deadlines()
+        def key(j):
+            d = deadlines.get(j.get("job_id",""))
+            return (d.isoformat() if d else "~", j.get("job_id",""))
+        return key
+    return lambda j: (j.get("title","").lower(), j.get("job_id",""))
+
+def _app_key(by: str):
+    if by == "company":
+        return lambda a: (a["company"].lower(), a["title"].lower(), a.get("job_id",""))
+    if by == "applied_at":
+        return lambda a: (a.get("applied_at",""), a["title"].lower(), a.get("job_id",""))
+    return lambda a: (a["title"].lower(), a.get("applied_at",""), a.get("job_id",""))
+
 def sort_candidates(cands: List[Dict[str,str]], by="first_name") -> List[Dict[str,str]]:
-    return sorted(cands, key=lambda x: x.get(by,"").lower())
+    return sorted(cands, key=_candidate_key(by))
 
 def sort_jobs(jobs: List[Dict[str,str]], by="title") -> List[Dict[str,str]]:
-    key_funcs = {
-        "title": lambda j: j.get("title","").lower(),
-        "company": lambda j: (model.get_company(j.get("company_id","")) or {}).get("name","").lower(),
-        "deadline": lambda j: j.get("deadline","")
-    }
-    return sorted(jobs, key=key_funcs.get(by, key_funcs["title"]))
+    return sorted(jobs, key=_job_key(by))
 
 def sort_apps(apps: List[Dict[str,str]], by="title") -> List[Dict[str,str]]:
-    def key_title(a):
-        job = model.get_job(a["job_id"]) or {}
-        return job.get("title","").lower()
-    def key_company(a):
-        job = model.get_job(a["job_id"]) or {}
-        comp = model.get_company(job.get("company_id","") ) or {}
-        return comp.get("name","").lower()
-    def key_date(a):
-        return a.get("applied_at","")
-    key_map = {"title": key_title, "company": key_company, "applied_at": key_date}
-    return sorted(apps, key=key_map.get(by, key_title))
+    """Sort applications; rows without "title"/"company" are joined first."""
+    if apps and "title" not in apps[0]:
+        apps = join_apps(apps)
+    return sorted(apps, key=_app_key(by))
+
+# ---------- Pagination ----------
+# Listings are served from presorted (keys, rows) indexes memoized per data
+# version; a page starts right after the cursor key, found by bisection.
+def encode_cursor(key: Tuple[str, ...]) -> str:
+    raw = json.dumps(list(key), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Key tuple from a cursor string; None (= first page) if it is invalid."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw.decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(key, list) or not all(isinstance(k, str) for k in key):
+        return None
+    return tuple(key)
+
+def page_args(args) -> Tuple[Optional[str], int]:
+    """(after cursor, page size) from request query args (?after=&limit=)"""
+    after = args.get("after") or None
+    try:
+        limit = int(args.get("limit", PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    return after, limit
+
+def _sorted_index(rows: List[Dict[str,str]], key) -> Tuple[list, list]:
+    pairs = sorted(((key(r), r) for r in rows), key=lambda p: p[0])
+    return [k for k, _ in pairs], [r for _, r in pairs]
+
+def _page(index: Tuple[list, list], after: Optional[str], limit: int):
+    keys, rows = index
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    start = 0
+    after_key = decode_cursor(after)
+    if after_key is not None:
+        start = bisect.bisect_right(keys, after_key)
+    end = start + limit
+    next_cursor = encode_cursor(keys[end - 1]) if end < len(keys) else None
+    return rows[start:end], next_cursor
+
+def _open_jobs_index(sort_by: str):
+    if sort_by not in JOB_SORTS:
+        sort_by = "title"
+    return model.cached(f"open_jobs_by:{sort_by}", (model.JOBS_CSV, model.COMPANIES_CSV),
+                        lambda: _sorted_index(model.list_jobs(only_open=True), _job_key(sort_by)))
+
+def _candidates_index(sort_by: str):
+    if sort_by not in CANDIDATE_SORTS:
+        sort_by = "first_name"
+    return model.cached(f"candidates_by:{sort_by}", (model.CANDIDATES_CSV,),
+                        lambda: _sorted_index(model.list_candidates(), _candidate_key(sort_by)))
+
+def page_open_jobs(sort_by="title", after: Optional[str]=None, limit: int=PAGE_SIZE):
+    """One page of open jobs -> (jobs, cursor of the next page or None)"""
+    return _page(_open_jobs_index(sort_by), after, limit)
+
+def page_candidates(sort_by="first_name", after: Optional[str]=None, limit: int=PAGE_SIZE):
+    """One page of candidates -> (candidates, cursor of the next page or None)"""
+    return _page(_candidates_index(sort_by), after, limit)
+
+# ---------- Search ----------
+# One inverted index over every job lives for the life of the process.  When
+# jobs.csv or companies.csv changes it is synced row by row, so only new or
+# edited jobs are re-tokenized.  Ranked results are memoized per (query,
+# data version) so that paging through them does not search again.
+_job_index = search.InvertedIndex(JOB_SEARCH_WEIGHTS)
+
+def job_search_index() -> search.InvertedIndex:
+    def build():
+        names = company_names()
+        _job_index.sync({j["job_id"]: (j.get("title",""), names.get(j.get("company_id",""), ""),
+                                       j.get("description",""))
+                         for j in model.list_jobs()})
+        return _job_index
+    return model.cached("job_search_index", (model.JOBS_CSV, model.COMPANIES_CSV), build)
+
+def normalize_query(q: Optional[str]) -> str:
+    return " ".join((q or "").split())[:MAX_QUERY_LENGTH]
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _search_index(query: str, version) -> Tuple[list, list]:
+    jobs = model.job_map()
+    keys, rows = [], []
+    for job_id, score in job_search_index().search(query):
+        job = jobs.get(job_id)
+        if job is None or job.get("status","").upper() != "OPEN":
+            continue
+        # ranked best first; the fixed-width inverted score keeps string keys in rank order
+        keys.append((f"{1e6 - score:017.6f}", job.get("title","").lower(), job_id))
+        rows.append(job)
+    return keys, rows
+
+def search_open_jobs(query: str, after: Optional[str]=None, limit: int=PAGE_SIZE):
+    """Open jobs matching query, most relevant first -> (jobs, next cursor or None)"""
+    query = normalize_query(query)
+    if not query:
+        return [], None
+    version = (model.data_version(model.JOBS_CSV), model.data_version(model.COMPANIES_CSV))
+    return _page(_search_index(query.casefold(), version), after, limit)
+
+# ---------- Pre-fork warm-up ----------
+def warm() -> None:
+    """Load every table and build the indexes hot requests use, so a
+    pre-forking server can do it once in the master (see gunicorn.conf.py)."""
+    today = datetime.now().date()
+    model.open_job_ids(today)
+    model.candidate_map()
+    model.get_candidate("")
+    model.application_counts_by_job()
+    model.has_application("", "")
+    model.list_applications_by_candidate("")
+    model.list_applications_by_job("")
+    for sort_by in JOB_SORTS:
+        _open_jobs_index(sort_by)
+    _candidates_index(CANDIDATE_SORTS[0])
+    job_search_index()
 
 # ---------- Business logic ----------
-def login(candidate_id: str, email: str):
+@lru_cache(maxsize=USER_CACHE_SIZE)
+def _candidate_entry(candidate_id: str, version) -> tuple:
+    """(record, normalized email) for a candidate; version keys out stale entries"""
     user = model.get_candidate(candidate_id)
+    if not user:
+        return None, ""
+    return user, user.get("email","").strip().lower()
+
+def current_user(candidate_id: str) -> Optional[Dict[str,str]]:
+    """Candidate record for a logged-in session, served from an LRU cache."""
+    return _candidate_entry(candidate_id, model.data_version(model.CANDIDATES_CSV))[0]
+
+def login(candidate_id: str, email: str):
+    user, user_email = _candidate_entry(candidate_id, model.data_version(model.CANDIDATES_CSV))
     if not user:
         return None, "ไม่พบรหัสผู้ใช้"
-    if user.get("email","").lower() != email.lower():
+    if user_email != email.strip().lower():
         return None, "อีเมลไม่ถูกต้อง"
     return user, None
 
 def get_open_jobs_sorted(sort_by="title"):
-    jobs = model.list_jobs(only_open=True)
-    return sort_jobs(jobs, by=sort_by)
+    return list(_open_jobs_index(sort_by)[1])
 
 
 def can_apply(job_id: str) -> tuple[bool, str]:
+    today = datetime.now().date()
+    # fast path: today's open set is computed once per day / jobs.csv change
+    if job_id in model.open_job_ids(today):
+        return True, ""
+
     job = model.get_job(job_id)
     if not job:
         return False, "ไม่พบตำแหน่งงาน"
@@ -50,14 +246,13 @@ def can_apply(job_id: str) -> tuple[bool, str]:
     if job.get("status", "").upper() != "OPEN":
         return False, "ตำแหน่งนี้ปิดรับสมัครแล้ว"
 
-    # รองรับทั้ง str/date/datetime (parse_date_ymd ของคุณรองรับหลายฟอร์แมตแล้ว)
-    raw_deadline = job.get("deadline", "")
-    deadline = model.parse_date_ymd(raw_deadline)
+    # deadlines are parsed once per jobs.csv version (d/m/Y and Y-m-d both accepted)
+    deadline = model.job_deadlines().get(job_id)
 
     if deadline is None:
         return False, "ข้อมูลวันปิดรับสมัครไม่ถูกต้อง"
 
-    if datetime.now().date() > deadline.date():
+    if today > deadline:
         return False, "วันนี้เกินวันปิดรับสมัครแล้ว"
 
     return True, ""
@@ -78,36 +273,171 @@ def apply_job(job_id: str, candidate_id: str) -> tuple[bool, str]:
     if not ok:
         return False, msg
 
-    # prevent duplicate application
-    existing = model.list_applications_by_candidate(candidate_id)
-    for a in existing:
-        if a["job_id"] == job_id:
-            return False, "คุณสมัครตำแหน่งนี้แล้ว"
-
-    model.add_application(job_id, candidate_id, datetime.now())
+    # prevent duplicate application: check and insert happen under one lock
+    if not model.add_application_if_new(job_id, candidate_id, datetime.now()):
+        return False, "คุณสมัครตำแหน่งนี้แล้ว"
     return True, "สมัครงานสำเร็จ"
 
+# Web submissions go through submit_application: a repeat of a request already
+# answered (same candidate, job and idempotency key) gets the stored answer, a
+# candidate over the rate limit is turned away before any data is read, and
+# identical applies that arrive while one is running share its result instead
+# of each taking the applications lock only to find the row already there.
+_apply_limiter = throttle.TokenBucket(APPLY_RATE_PER_MINUTE / 60, APPLY_BURST)
+_apply_flights = throttle.SingleFlight()
+_apply_results = throttle.RecentResults(IDEMPOTENCY_TTL)
+
+def submit_application(job_id: str, candidate_id: str, key: str = "") -> tuple[bool, str, float]:
+    """apply_job for a web request.  Returns (ok, message, retry_after), where
+    retry_after > 0 means the candidate was rate limited and nothing was done."""
+    key = (key or "").strip()[:MAX_IDEMPOTENCY_KEY_LENGTH]
+    done_key = (candidate_id, job_id, key)
+    if key:
+        done = _apply_results.get(done_key)
+        if done is not None:
+            return done + (0.0,)
+    retry_after = _apply_limiter.take(candidate_id)
+    if retry_after:
+        return False, "ส่งคำขอถี่เกินไป กรุณารอสักครู่แล้วลองใหม่", retry_after
+    ok, msg = _apply_flights.do((candidate_id, job_id), lambda: apply_job(job_id, candidate_id))
+    if key:
+        _apply_results.put(done_key, (ok, msg))
+    return ok, msg, 0.0
+
+
+def text_field(value) -> Optional[str]:
+    """A field of a JSON/CSV record as stripped text: strings as they are,
+    integers (ids exported as numbers) as digits, missing values as "";
+    None for anything else (floats, lists, objects, booleans)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+def bulk_apply(records: Iterable[Dict[str,str]], now: Optional[datetime]=None):
+    """Validate and store many applications at once (e.g. kiosk exports).
+
+    records are dicts with job_id, candidate_id and optionally applied_at
+    ("YYYY-MM-DD HH:MM:SS"); they are consumed lazily.  Every accepted row is
+    written in a single append.  Returns (accepted, rejected) where rejected
+    is a list of (record number starting at 1, record, reason).
+    """
+    now = now or datetime.now()
+    open_ids = model.open_job_ids(now.date())
+    seen = set()
+    accepted, rejected = [], []
+    for n, rec in enumerate(records, start=1):
+        job_id = text_field(rec.get("job_id"))
+        candidate_id = text_field(rec.get("candidate_id"))
+        if job_id is None or candidate_id is None:
+            rejected.append((n, rec, "รูปแบบข้อมูลไม่ถูกต้อง (job_id/candidate_id)"))
+            continue
+        if not job_id or not candidate_id:
+            rejected.append((n, rec, "ข้อมูลไม่ครบ (job_id/candidate_id)"))
+            continue
+        if job_id not in open_ids:
+            ok, msg = can_apply(job_id)
+            if not ok:
+                rejected.append((n, rec, msg))
+                continue
+        if not model.get_candidate(candidate_id):
+            rejected.append((n, rec, "ไม่พบผู้สมัคร"))
+            continue
+        if (job_id, candidate_id) in seen or model.has_application(job_id, candidate_id):
+            rejected.append((n, rec, "คุณสมัครตำแหน่งนี้แล้ว"))
+            continue
+        applied_at = text_field(rec.get("applied_at")) or ""
+        try:
+            datetime.strptime(applied_at, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            applied_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        seen.add((job_id, candidate_id))
+        accepted.append((n, rec, {"job_id": job_id, "candidate_id": candidate_id, "applied_at": applied_at}))
+    # pairs written by someone else since the check above are dropped atomically here
+    written = model.add_applications_if_new([row for _, _, row in accepted])
+    written_ids = {id(row) for row in written}
+    for n, rec, row in accepted:
+        if id(row) not in written_ids:
+            rejected.append((n, rec, "คุณสมัครตำแหน่งนี้แล้ว"))
+    rejected.sort(key=lambda x: x[0])
+    return written, rejected
 
 def candidate_profile(candidate_id: str, sort_by="title"):
     cand = model.get_candidate(candidate_id)
     if not cand:
         return None, [], "ไม่พบผู้สมัคร"
-    apps = model.list_applications_by_candidate(candidate_id)
+    apps = join_apps(model.list_applications_by_candidate(candidate_id))
     apps = sort_apps(apps, by=sort_by)
     return cand, apps, ""
 
+def candidate_profile_page(candidate_id: str, sort_by="title", after: Optional[str]=None,
+                           limit: int=PAGE_SIZE):
+    """Like candidate_profile, one page at a time -> (cand, apps, next_cursor, err)"""
+    cand = model.get_candidate(candidate_id)
+    if not cand:
+        return None, [], None, "ไม่พบผู้สมัคร"
+    apps = join_apps(model.list_applications_by_candidate(candidate_id))
+    apps, next_cursor = _page(_sorted_index(apps, _app_key(sort_by)), after, limit)
+    return cand, apps, next_cursor, ""
+
 def admin_counts_by_job():
     jobs = model.list_jobs(only_open=False)
+    counts = model.application_counts_by_job()
+    names = company_names()
     result = []
     for j in jobs:
-        count = len(model.list_applications_by_job(j["job_id"]))
-        comp = model.get_company(j["company_id"]) or {}
         result.append({
             "job_id": j["job_id"],
             "title": j["title"],
-            "company": comp.get("name",""),
+            "company": names.get(j["company_id"], ""),
             "deadline": j["deadline"],
             "status": j["status"],
-            "applicants": count
+            "applicants": counts.get(j["job_id"], 0)
         })
     return result
+
+# ---------- Export ----------
+# Applications joined with their job, company and candidate, produced one row
+# at a time so an export of any size runs in constant memory.
+EXPORT_COLUMNS = ("applied_at", "job_id", "title", "company_id", "company",
+                  "candidate_id", "first_name", "last_name", "email")
+
+def _export_source(job_id: Optional[str], company_id: Optional[str]) -> Iterable[Dict[str,str]]:
+    if job_id:
+        return model.list_applications_by_job(job_id)
+    if company_id:
+        job_ids = [j["job_id"] for j in model.list_jobs() if j.get("company_id") == company_id]
+        return itertools.chain.from_iterable(model.list_applications_by_job(j) for j in job_ids)
+    return model.iter_applications()
+
+def export_applications(job_id: Optional[str]=None, company_id: Optional[str]=None,
+                        since: Optional[date]=None, until: Optional[date]=None) -> Iterator[tuple]:
+    """Yield EXPORT_COLUMNS tuples for applications matching every given filter.
+
+    since/until are inclusive days of applied_at.  Rows without a job_id or
+    candidate_id are skipped.  Rows come in file order (grouped by job when
+    filtering by company).
+    """
+    jobs = model.job_map()
+    companies = model.company_map()
+    candidates = model.candidate_map()
+    lo = since.isoformat() if since else ""
+    hi = (until + timedelta(days=1)).isoformat() if until else None
+    for a in _export_source(job_id, company_id):
+        if not a.get("job_id") or not a.get("candidate_id"):
+            continue  # blank or partial line in applications.csv
+        applied_at = a.get("applied_at","")
+        if applied_at < lo or (hi is not None and applied_at >= hi):
+            continue
+        job = jobs.get(a.get("job_id","")) or {}
+        cid = job.get("company_id","")
+        if company_id and cid != company_id:
+            continue
+        comp = companies.get(cid) or {}
+        cand = candidates.get(a.get("candidate_id","")) or {}
+        yield (applied_at, a.get("job_id",""), job.get("title",""), cid, comp.get("name",""),
+               a.get("candidate_id",""), cand.get("first_name",""), cand.get("last_name",""),
+               cand.get("email",""))
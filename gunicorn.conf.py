@@ -0,0 +1,41 @@
+# Production WSGI server settings:  gunicorn -c gunicorn.conf.py view:app
+# Threaded workers: a request waiting on disk only holds its own thread, and
+# the per-process CSV cache is shared by all threads of a worker.
+#
+# Pre-fork mode (the default): the master imports the app, loads every table
+# and builds the hot indexes once (controller.warm), then freezes them out of
+# the garbage collector's reach and forks.  Workers start with that data
+# already in memory and share its pages copy-on-write instead of each parsing
+# its own copy; the applications snapshot is shared through the page cache.
+# A write by any worker bumps model's shared generation counter, so the
+# others reload just the changed table.  JOBFAIR_PRELOAD=0 loads per worker.
+import gc
+import os
+
+bind = os.environ.get("JOBFAIR_BIND", "0.0.0.0:8000")
+worker_class = "gthread"
+workers = int(os.environ.get("JOBFAIR_WORKERS") or os.cpu_count() or 1)
+threads = int(os.environ.get("JOBFAIR_WORKER_THREADS", "16"))
+timeout = 60
+keepalive = 5
+accesslog = "-"
+
+preload_app = os.environ.get("JOBFAIR_PRELOAD", "1") != "0"
+# with the generation counter, re-stat files at most once a second for edits
+# made outside the app (set before model is imported)
+os.environ.setdefault("JOBFAIR_STAT_INTERVAL", "1")
+
+def when_ready(server):
+    # runs in the master after the preloaded app is imported, before any fork
+    if preload_app:
+        import controller
+        controller.warm()
+        gc.collect()
+        gc.freeze()
+
+def post_worker_init(worker):
+    # one worker runs the deadline scheduler (the first to take its lock file);
+    # JOBFAIR_SCHEDULER=off when `python scheduler.py` runs separately
+    import scheduler
+    if scheduler.enabled():
+        scheduler.start_singleton()
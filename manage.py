@@ -0,0 +1,94 @@
+# Maintenance commands for the Job Fair MVC data files.
+#   python manage.py import-sqlite [--db jobfair.db]   copy the CSVs into SQLite
+#   python manage.py compact                           drop blank/duplicate rows
+#   python manage.py migrate-dates                     rewrite job deadlines as YYYY-MM-DD
+#   python manage.py ingest FILE [--rejects OUT.csv]   bulk-import applications (CSV or JSONL)
+#   python manage.py snapshot                          rebuild applications.snap (fast cold start)
+# Run the app on SQLite with: JOBFAIR_STORAGE=sqlite python view.py
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+import controller
+import model
+
+def cmd_import_sqlite(args):
+    db = Path(args.db) if args.db else model.SQLITE_DB
+    counts = model.import_csv_to_sqlite(db)
+    print("Imported into", db)
+    for table, n in counts.items():
+        print(f"- {table}: {n} rows")
+
+def cmd_compact(args):
+    dropped = model.compact_csv(model.APPLICATIONS_CSV)
+    print(f"applications.csv: dropped {dropped} rows")
+
+def cmd_migrate_dates(args):
+    n = model.migrate_deadlines_to_iso()
+    print(f"jobs: {n} deadlines rewritten as YYYY-MM-DD")
+
+def cmd_snapshot(args):
+    n = model.build_snapshot(model.APPLICATIONS_CSV)
+    print(f"applications.snap: {n} rows")
+
+def iter_records(path: Path, fmt: str):
+    """Yield dicts from a CSV (with header) or JSON-lines file, one at a time."""
+    with path.open(newline="", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    rec = None
+                yield rec if isinstance(rec, dict) else {"raw": line}
+        else:
+            yield from csv.DictReader(f)
+
+def cmd_ingest(args):
+    path = Path(args.file)
+    fmt = args.format or ("jsonl" if path.suffix.lower() in (".jsonl", ".ndjson") else "csv")
+    accepted, rejected = controller.bulk_apply(iter_records(path, fmt))
+    print(f"accepted: {len(accepted)}, rejected: {len(rejected)}")
+    out = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["record", "job_id", "candidate_id", "reason"])
+        for n, rec, reason in rejected:
+            writer.writerow([n, rec.get("job_id", ""), rec.get("candidate_id", ""), reason])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job Fair data maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import-sqlite", help="copy CSV data into a SQLite database")
+    p.add_argument("--db", help=f"database file (default: {model.SQLITE_DB.name})")
+    p.set_defaults(func=cmd_import_sqlite)
+
+    p = sub.add_parser("compact", help="rewrite applications.csv without blank/duplicate rows")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("migrate-dates", help="rewrite job deadlines in ISO format")
+    p.set_defaults(func=cmd_migrate_dates)
+
+    p = sub.add_parser("ingest", help="bulk-import applications from a CSV or JSONL file")
+    p.add_argument("file")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    p.add_argument("--rejects", help="write rejected rows to this CSV instead of stdout")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("snapshot", help="rebuild the memory-mapped snapshot of applications.csv")
+    p.set_defaults(func=cmd_snapshot)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
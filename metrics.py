@@ -0,0 +1,168 @@
+
+# Lightweight timing instrumentation (no external dependencies).
+# Durations go into process-wide histograms, exported in the Prometheus text
+# format by prometheus_text(), and into a per-request tally used for the
+# Server-Timing header.  view.py wires this up; see instrument().
+import cProfile
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Fraction of requests to run under cProfile (0 = off) and where to dump them.
+PROFILE_RATE = float(os.environ.get("JOBFAIR_PROFILE_RATE", "0") or 0)
+PROFILE_DIR = Path(os.environ.get("JOBFAIR_PROFILE_DIR") or Path(__file__).resolve().parent / "profiles")
+# Send the Server-Timing header to every client, not just admins (debugging).
+SERVER_TIMING_ALL = os.environ.get("JOBFAIR_SERVER_TIMING", "") == "all"
+
+class Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.n += 1
+
+_lock = threading.Lock()
+# family -> label value -> histogram
+_histograms: Dict[str, Dict[str, Histogram]] = {"call": {}, "request": {}}
+_request: ContextVar[Optional[dict]] = ContextVar("jobfair_request_metrics", default=None)
+
+def observe(family: str, label: str, seconds: float) -> None:
+    with _lock:
+        h = _histograms[family].get(label)
+        if h is None:
+            h = _histograms[family][label] = Histogram()
+        h.observe(seconds)
+    if family == "call":
+        tally = _request.get()
+        if tally is not None:
+            count, total = tally.get(label, (0, 0.0))
+            tally[label] = (count + 1, total + seconds)
+
+@contextmanager
+def timer(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("call", name, time.perf_counter() - t0)
+
+def timed(name: str):
+    """Decorator: record every call of the function under `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("call", name, time.perf_counter() - t0)
+        inner.__wrapped_timed__ = True
+        return inner
+    return wrap
+
+def timed_iter(name: str, chunks):
+    """Time a streamed body from first to last chunk."""
+    t0 = time.perf_counter()
+    try:
+        yield from chunks
+    finally:
+        observe("call", name, time.perf_counter() - t0)
+
+def instrument(module, names: Optional[List[str]] = None) -> None:
+    """Replace module functions with timed wrappers, in place.
+
+    Callers inside the module look functions up as globals, so they get the
+    wrapped versions too.  names defaults to every public function defined
+    in the module.
+    """
+    if names is None:
+        names = [n for n, f in vars(module).items()
+                 if inspect.isfunction(f) and not n.startswith("_")
+                 and f.__module__ == module.__name__]
+    prefix = module.__name__.rsplit(".", 1)[-1]
+    for n in names:
+        fn = getattr(module, n)
+        if not getattr(fn, "__wrapped_timed__", False):
+            setattr(module, n, timed(f"{prefix}.{n}")(fn))
+
+# ---------- Per-request ----------
+def start_request() -> dict:
+    """Begin a per-request tally; returns a token for finish_request."""
+    state = {"t0": time.perf_counter(), "tally": {}, "profile": None}
+    state["reset"] = _request.set(state["tally"])
+    if PROFILE_RATE and random.random() < PROFILE_RATE:
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            state["profile"] = prof
+        except ValueError:  # another profiler is already active
+            pass
+    return state
+
+def finish_request(state: dict, endpoint: str) -> Dict[str, tuple]:
+    """Record the request duration; returns {name: (calls, seconds)} for it."""
+    observe("request", endpoint or "unknown", time.perf_counter() - state["t0"])
+    prof = state.get("profile")
+    if prof is not None:
+        prof.disable()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        prof.dump_stats(PROFILE_DIR / f"{endpoint or 'unknown'}-{stamp}-{os.getpid()}-{id(state):x}.prof")
+    _request.reset(state["reset"])
+    return state["tally"]
+
+def server_timing(tally: Dict[str, tuple]) -> str:
+    """Server-Timing header value, e.g. model._read_csv;dur=1.2;desc="2 calls" """
+    parts = []
+    for name, (count, total) in sorted(tally.items(), key=lambda kv: -kv[1][1]):
+        metric = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        parts.append(f'{metric};dur={total * 1000:.2f};desc="{count} calls"')
+    return ", ".join(parts)
+
+# ---------- Export ----------
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text() -> str:
+    families = (
+        ("call", "jobfair_call_seconds", "fn", "Time spent in instrumented functions."),
+        ("request", "jobfair_request_seconds", "endpoint", "Request handling time by endpoint."),
+    )
+    lines = []
+    with _lock:
+        for family, metric, label, help_text in families:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for value, h in sorted(_histograms[family].items()):
+                lv = f'{label}="{_escape(value)}"'
+                cumulative = 0
+                for bound, c in zip(BUCKETS, h.counts):
+                    cumulative += c
+                    lines.append(f'{metric}_bucket{{{lv},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{lv},le="+Inf"}} {h.n}')
+                lines.append(f"{metric}_sum{{{lv}}} {h.total:.6f}")
+                lines.append(f"{metric}_count{{{lv}}} {h.n}")
+    return "\n".join(lines) + "\n"
+
+def reset() -> None:
+    with _lock:
+        for family in _histograms.values():
+            family.clear()
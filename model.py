@@ -1,10 +1,29 @@
 
 import csv
+import itertools
+import mmap
+import os
+import sqlite3
+import stat
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, date, timezone
+from collections import Counter
+from functools import lru_cache
+from typing import Iterator, List, Dict, Optional, Tuple
+import records
+import snapshot
 
-DATA_DIR = Path(__file__).resolve().parent
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+DATA_DIR = Path(os.environ.get("JOBFAIR_DATA_DIR") or Path(__file__).resolve().parent)
 
 COMPANIES_CSV   = DATA_DIR / "companies.csv"
 JOBS_CSV        = DATA_DIR / "jobs.csv"
@@ -13,6 +32,82 @@ APPLICATIONS_CSV= DATA_DIR / "applications.csv"
 
 DATE_FMT = "%Y-%m-%d"
 
+SCHEMAS = {
+    COMPANIES_CSV: ["company_id","name","email","location"],
+    JOBS_CSV: ["job_id","title","description","company_id","deadline","status"],
+    CANDIDATES_CSV: ["candidate_id","first_name","last_name","email","role"],
+    APPLICATIONS_CSV: ["job_id","candidate_id","applied_at"],
+}
+
+# Row class per table (see records.py); the cache and both backends hand these
+# out instead of plain dicts.
+RECORD_TYPES = {
+    COMPANIES_CSV: records.Company,
+    JOBS_CSV: records.Job,
+    CANDIDATES_CSV: records.Candidate,
+    APPLICATIONS_CSV: records.Application,
+}
+
+# Storage backend: "csv" (the files above) or "sqlite" (see import_csv_to_sqlite).
+STORAGE = os.environ.get("JOBFAIR_STORAGE", "csv").lower()
+SQLITE_DB = Path(os.environ.get("JOBFAIR_DB") or DATA_DIR / "jobfair.db")
+
+# Appends are not fsync'ed by default; set to True to trade latency for durability.
+FSYNC_APPENDS = False
+# Tables loaded from a memory-mapped columnar snapshot (see snapshot.py) when
+# one matches the CSV; a stale one is rewritten by the next full load.
+SNAPSHOTS = os.environ.get("JOBFAIR_SNAPSHOTS", "1") != "0"
+SNAPSHOT_TABLES = (APPLICATIONS_CSV,)
+# past this many rows after the snapshot's end, reparse the CSV and re-snapshot
+SNAPSHOT_MAX_TAIL = 50000
+
+# ---------- Locking ----------
+# Writers hold an exclusive flock on "<file>.lock" (plus a per-file thread lock,
+# since flock does not serialize threads sharing one descriptor); a reload of
+# the cache takes it shared so it never sees a half-appended row.  Holding the
+# lock again from the same thread is a no-op, so locked helpers can nest.
+_thread_locks: Dict[Path, threading.RLock] = {}
+_held = threading.local()
+
+@contextmanager
+def _locked(path: Path, shared: bool = False):
+    held = _held.__dict__.setdefault("paths", {})
+    if held.get(path):
+        held[path] += 1
+        try:
+            yield
+        finally:
+            held[path] -= 1
+        return
+    tlock = _thread_locks.setdefault(path, threading.RLock())
+    with nullcontext() if shared else tlock:
+        lf = _open_lock_file(path, shared)
+        with lf if lf is not None else nullcontext():
+            if fcntl is not None and lf is not None:
+                fcntl.flock(lf.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            held[path] = 1
+            try:
+                yield
+            finally:
+                held[path] = 0
+                if fcntl is not None and lf is not None:
+                    fcntl.flock(lf.fileno(), fcntl.LOCK_UN)
+
+def _open_lock_file(path: Path, shared: bool):
+    """The lock file, created if needed.  Readers of a data dir they cannot
+    write to take an existing lock file read-only, or go without one (None)
+    when there is none, since no writer there has ever used it."""
+    name = str(path) + ".lock"
+    try:
+        return open(name, "a")
+    except OSError:
+        if not shared:
+            raise
+    try:
+        return open(name, "r")
+    except OSError:
+        return None
+
 def _read_csv(path: Path) -> List[Dict[str, str]]:
     if not path.exists():
         return []
@@ -20,84 +115,814 @@ def _read_csv(path: Path) -> List[Dict[str, str]]:
         reader = csv.DictReader(f)
         return list(reader)
 
+def _read_records(path: Path) -> list:
+    """Like _read_csv, but typed records (csv.reader: no dict per row)."""
+    if not path.exists():
+        return []
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        return RECORD_TYPES[path].from_rows(header, reader)
+
+# mode of a CSV created by a rewrite (mkstemp's own 0600 would hide it from
+# other users); an existing file keeps its mode
+NEW_FILE_MODE = 0o644
+
 def _write_csv(path: Path, rows: List[Dict[str, str]]):
+    """Replace the file atomically: write a temp file next to it, then rename."""
     if not rows:
         # if empty, we still need headers; infer from known schemas
-        schemas = {
-            COMPANIES_CSV: ["company_id","name","email","location"],
-            JOBS_CSV: ["job_id","title","description","company_id","deadline","status"],
-            CANDIDATES_CSV: ["candidate_id","first_name","last_name","email","role"],
-            APPLICATIONS_CSV: ["job_id","candidate_id","applied_at"],
-        }
-        headers = schemas.get(path, list(rows[0].keys()) if rows else [])
+        headers = SCHEMAS.get(path, [])
     else:
         headers = list(rows[0].keys())
-    with path.open("w", newline="", encoding="utf-8") as f:
+    with _locked(path):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                mode = NEW_FILE_MODE
+            os.chmod(tmp, mode)
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=headers)
+                writer.writeheader()
+                for r in rows:
+                    writer.writerow(r)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            _generations.bump(path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        invalidate(path)
+
+# ---------- In-memory cache ----------
+# Each CSV is parsed once and kept with the (mtime, size) stamp it was read at.
+# A different stamp on the next access means the file changed on disk, so the
+# table and every index built from it are dropped and reloaded.
+# Rows are cached as typed records (records.py), which also read like dicts of
+# the CSV text.  Cached rows are shared between callers: treat them as read-only.
+_cache: Dict[Path, dict] = {}
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# ---------- Cross-process change signal ----------
+# Every write through this module bumps a per-table counter in a small file
+# that all processes sharing DATA_DIR mmap, so reading it costs a memory load
+# rather than a syscall.  While a table's counter is unchanged its file stamp
+# is re-checked only every STAT_INTERVAL seconds, yet writes by any worker are
+# seen on the next access.  Only edits made outside this module wait for the
+# interval; 0 (the default) stats on every access as before.
+STAT_INTERVAL = float(os.environ.get("JOBFAIR_STAT_INTERVAL", "0") or 0)
+GENERATIONS_FILE = DATA_DIR / ".jobfair-generations"
+_TABLE_SLOTS = {path: i for i, path in enumerate(SCHEMAS)}
+
+class _Generations:
+    def __init__(self, path: Path):
+        self.path = path
+        self._mm = None
+        self._lock = threading.Lock()
+
+    def _map(self):
+        if self._mm is None:
+            with self._lock:
+                if self._mm is None:
+                    size = 8 * len(_TABLE_SLOTS)
+                    try:
+                        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                        try:
+                            if os.fstat(fd).st_size < size:
+                                os.ftruncate(fd, size)
+                            self._mm = mmap.mmap(fd, size)
+                        finally:
+                            os.close(fd)
+                    except OSError:
+                        self._mm = False  # e.g. read-only data dir: no shared signal
+        return self._mm
+
+    def read(self, path: Path) -> Optional[int]:
+        mm, slot = self._map(), _TABLE_SLOTS.get(path)
+        if not mm or slot is None:
+            return None
+        return struct.unpack_from("<Q", mm, 8 * slot)[0]
+
+    def bump(self, path: Path) -> None:
+        """Signal a write to path; the caller holds its exclusive lock."""
+        mm, slot = self._map(), _TABLE_SLOTS.get(path)
+        if mm and slot is not None:
+            n = struct.unpack_from("<Q", mm, 8 * slot)[0]
+            struct.pack_into("<Q", mm, 8 * slot, (n + 1) % 2**64)
+
+_generations = _Generations(GENERATIONS_FILE)
+_stamps: Dict[Path, tuple] = {}  # path -> (generation, checked at, stamp)
+
+def _current_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    """_stamp(path), reused while nothing was written (see STAT_INTERVAL)."""
+    if STAT_INTERVAL <= 0:
+        return _stamp(path)
+    gen = _generations.read(path)
+    if gen is None:
+        return _stamp(path)
+    now = time.monotonic()
+    hit = _stamps.get(path)
+    if hit is not None and hit[0] == gen and now - hit[1] < STAT_INTERVAL:
+        return hit[2]
+    stamp = _stamp(path)
+    _stamps[path] = (gen, now, stamp)
+    return stamp
+
+def _load(path: Path, stamp) -> dict:
+    """Cache entry for the current file contents (caller holds the lock).
+
+    With a matching snapshot the rows stay in the mmap'ed file ("rows" is
+    None until something needs them all) and only the rows appended since
+    are parsed ("tail").
+    """
+    use_snapshot = SNAPSHOTS and path in SNAPSHOT_TABLES and stamp is not None
+    if use_snapshot:
+        snap = snapshot.open_for(path)
+        if snap is not None:
+            tail = snap.tail(path)
+            if len(tail) <= SNAPSHOT_MAX_TAIL:
+                return {"stamp": stamp, "rows": None, "snapshot": snap, "tail": tail, "indexes": {}}
+    rows = _read_records(path)
+    if use_snapshot:
+        try:
+            snapshot.write(path, rows, snapshot.source_of(path, stamp[1]))
+        except OSError:
+            pass  # read-only data dir: keep working from the CSV
+    return {"stamp": stamp, "rows": rows, "indexes": {}}
+
+def _table(path: Path) -> dict:
+    stamp = _current_stamp(path)
+    entry = _cache.get(path)
+    if entry is None or entry["stamp"] != stamp:
+        with _locked(path, shared=True):
+            stamp = _stamp(path)
+            entry = _load(path, stamp)
+        _cache[path] = entry
+    return entry
+
+def _entry_rows(entry: dict) -> list:
+    if entry["rows"] is None:
+        entry["rows"] = entry["snapshot"].rows() + entry["tail"]
+    return entry["rows"]
+
+def _rows(path: Path) -> List[Dict[str, str]]:
+    return _entry_rows(_table(path))
+
+def _iter_rows(path: Path) -> Iterator[Dict[str, str]]:
+    """Rows one at a time; a snapshot-backed table is not materialized."""
+    entry = _table(path)
+    if entry["rows"] is not None:
+        return iter(entry["rows"])
+    snap = entry["snapshot"]
+    return itertools.chain(map(snap.record, range(snap.n)), entry["tail"])
+
+def _unique_index(path: Path, field: str) -> Dict[str, Dict[str, str]]:
+    """field value -> row (first occurrence wins, like the old linear scan)"""
+    entry = _table(path)
+    key = ("unique", field)
+    idx = entry["indexes"].get(key)
+    if idx is None:
+        idx = {}
+        for r in _entry_rows(entry):
+            idx.setdefault(r.get(field, ""), r)
+        entry["indexes"][key] = idx
+    return idx
+
+def _group_index(path: Path, field: str) -> Dict[str, List[Dict[str, str]]]:
+    """field value -> rows having that value, in file order"""
+    entry = _table(path)
+    key = ("group", field)
+    idx = entry["indexes"].get(key)
+    if idx is None and entry["rows"] is None and field in snapshot.KEY_FIELDS:
+        idx = entry["indexes"][key] = snapshot.Groups(entry["snapshot"], field, entry["tail"])
+    if idx is None:
+        idx = {}
+        for r in _entry_rows(entry):
+            idx.setdefault(r.get(field, ""), []).append(r)
+        entry["indexes"][key] = idx
+    return idx
+
+def _count_index(path: Path, field: str) -> Counter:
+    """field value -> number of rows having that value"""
+    entry = _table(path)
+    key = ("count", field)
+    idx = entry["indexes"].get(key)
+    if idx is None and entry["rows"] is None and field in snapshot.KEY_FIELDS:
+        idx = entry["snapshot"].counts(field)
+        idx.update(r.get(field, "") for r in entry["tail"])
+        entry["indexes"][key] = idx
+    if idx is None:
+        idx = Counter(r.get(field, "") for r in _entry_rows(entry))
+        entry["indexes"][key] = idx
+    return idx
+
+def _key_set(path: Path, fields: Tuple[str, ...]) -> set:
+    """set of (field values...) tuples present in the table"""
+    entry = _table(path)
+    key = ("keyset", fields)
+    idx = entry["indexes"].get(key)
+    if idx is None and entry["rows"] is None and tuple(fields) == snapshot.KEY_FIELDS:
+        idx = entry["indexes"][key] = snapshot.KeySet(entry["snapshot"], entry["tail"])
+    if idx is None:
+        idx = {tuple(r.get(f, "") for f in fields) for r in _entry_rows(entry)}
+        entry["indexes"][key] = idx
+    return idx
+
+def _index_rows(entry: dict, rows: List[Dict[str, str]]) -> None:
+    """Add freshly appended rows to an up-to-date cache entry and its indexes."""
+    entry["rows" if entry["rows"] is not None else "tail"].extend(rows)
+    for (kind, field), idx in entry["indexes"].items():
+        for r in rows:
+            if kind == "unique":
+                idx.setdefault(r.get(field, ""), r)
+            elif kind == "count":
+                idx[r.get(field, "")] += 1
+            elif kind == "keyset":
+                idx.add(tuple(r.get(f, "") for f in field))
+            else:
+                idx.setdefault(r.get(field, ""), []).append(r)
+
+def build_snapshot(path: Path = APPLICATIONS_CSV) -> int:
+    """(Re)write the snapshot of a CSV table now; returns its row count."""
+    with _locked(path, shared=True):
+        stamp = _stamp(path)
+        if stamp is None:
+            return 0
+        rows = _read_records(path)
+        snapshot.write(path, rows, snapshot.source_of(path, stamp[1]))
+    return len(rows)
+
+def invalidate(path: Optional[Path] = None) -> None:
+    """Drop the cached copy of one CSV (or all of them)."""
+    if path is None:
+        _cache.clear()
+    else:
+        _cache.pop(path, None)
+
+# ---------- Append-only writes ----------
+# Concurrent appends are group-committed: each caller queues its rows, and
+# whichever thread gets the file lock first writes everything queued so far
+# in one flush.  The others find their rows already written and return.
+# Appends with a key (append_new) are deduplicated by that flush, under the
+# same lock, against the table and against rows earlier in the batch.
+class _Append:
+    __slots__ = ("rows", "fields", "written", "error", "done")
+
+    def __init__(self, rows: List[Dict[str, str]], fields: Optional[Tuple[str, ...]]):
+        self.rows = rows
+        self.fields = fields
+        self.written: List[Dict[str, str]] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+
+_queue_lock = threading.Lock()
+_pending: Dict[Path, List[_Append]] = {}
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as b:
+        b.seek(-1, os.SEEK_END)
+        return b.read(1) in (b"\n", b"\r")
+
+def _append_csv(path: Path, rows: List[Dict[str, str]],
+                fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, str]]:
+    """Queue rows for the end of the file and wait until they are written.
+    With fields, rows whose values of those fields are already in the table
+    (or queued before them) are dropped.  Returns the rows written."""
+    req = _Append(rows, fields)
+    with _queue_lock:
+        _pending.setdefault(path, []).append(req)
+    with _locked(path):
+        if not req.done:
+            with _queue_lock:
+                batch = _pending.pop(path, [])
+            _flush_appends(path, batch)
+    if req.error is not None:
+        raise OSError(f"append to {path.name} failed") from req.error
+    return req.written
+
+def _flush_appends(path: Path, batch: List[_Append]) -> None:
+    """Write the queued appends in one go (caller holds the exclusive lock)."""
+    out, queued = [], {}
+    try:
+        for req in batch:
+            if req.fields is None:
+                req.written = req.rows
+            else:
+                present = _key_set(path, req.fields)
+                keys = queued.setdefault(req.fields, set())
+                for r in req.rows:
+                    k = tuple(r.get(f, "") for f in req.fields)
+                    if k in present or k in keys:
+                        continue
+                    keys.add(k)
+                    req.written.append(r)
+            out.extend(req.written)
+        if out:
+            _write_appended(path, out)
+    except BaseException as exc:
+        for req in batch:
+            req.error, req.written = exc, []
+        raise
+    finally:
+        for req in batch:
+            req.done = True
+
+def _write_appended(path: Path, rows: List[Dict[str, str]]) -> None:
+    """Write rows at the end of the file without rereading it.
+
+    The header is written when the file is new or empty.  If the cache held
+    exactly the bytes we appended to, it is extended in place instead of
+    being thrown away and reparsed.
+    """
+    headers = SCHEMAS[path]
+    with path.open("a", newline="", encoding="utf-8") as f:
+        st = os.fstat(f.fileno())
+        entry = _cache.get(path)
+        in_sync = entry is not None and entry["stamp"] == (st.st_mtime_ns, st.st_size)
         writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
+        if st.st_size == 0:
+            writer.writeheader()
+        elif not _ends_with_newline(path):
+            f.write("\n")
         for r in rows:
             writer.writerow(r)
+        f.flush()
+        if FSYNC_APPENDS:
+            os.fsync(f.fileno())
+        st = os.fstat(f.fileno())
+    _generations.bump(path)
+    if in_sync:
+        _index_rows(entry, [RECORD_TYPES[path].from_dict(r) for r in rows])
+        entry["stamp"] = (st.st_mtime_ns, st.st_size)
+    else:
+        invalidate(path)
+
+def compact_csv(path: Path) -> int:
+    """Rewrite a CSV without blank rows and, for applications, without repeated
+    (job_id, candidate_id) pairs.  Returns the number of rows dropped.
+    Reads the whole file under the exclusive lock, so it is run offline
+    (`python manage.py compact`), never from a request."""
+    with _locked(path):
+        rows = _read_csv(path)
+        kept, seen = [], set()
+        for r in rows:
+            if not any((v or "").strip() for v in r.values()):
+                continue
+            if path == APPLICATIONS_CSV:
+                pair = (r.get("job_id"), r.get("candidate_id"))
+                if pair in seen:
+                    continue
+                seen.add(pair)
+            kept.append(r)
+        if len(kept) != len(rows):
+            _write_csv(path, kept)
+    return len(rows) - len(kept)
+
+# ---------- Storage backends ----------
+# Both backends are addressed with the CSV paths above, so upsert_row(path, ...)
+# keeps working whichever one is active.
+class CsvBackend:
+    name = "csv"
+
+    def rows(self, path: Path) -> List[Dict[str, str]]:
+        return list(_rows(path))
+
+    def iter_rows(self, path: Path) -> Iterator[Dict[str, str]]:
+        return _iter_rows(path)
+
+    def get(self, path: Path, field: str, value: str) -> Optional[Dict[str, str]]:
+        return _unique_index(path, field).get(value)
+
+    def group(self, path: Path, field: str, value: str) -> List[Dict[str, str]]:
+        return list(_group_index(path, field).get(value, []))
+
+    def counts(self, path: Path, field: str) -> Dict[str, int]:
+        # kept up to date by appends, see _index_rows
+        return _count_index(path, field)
+
+    def append(self, path: Path, rows: List[Dict[str, str]]) -> None:
+        _append_csv(path, rows)
+
+    def exists(self, path: Path, fields: Tuple[str, ...], values: Tuple[str, ...]) -> bool:
+        return tuple(values) in _key_set(path, fields)
+
+    def append_new(self, path: Path, fields: Tuple[str, ...],
+                   rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        # checked and written by one group-commit flush under the exclusive
+        # lock, so no other writer (thread or process) can slip the same key in
+        return _append_csv(path, rows, tuple(fields))
+
+    def upsert(self, path: Path, key_field: str, new_rows: List[Dict[str, str]]) -> None:
+        # one read-modify-write for the whole batch
+        with _locked(path):
+            rows = _read_csv(path)
+            pos = {}
+            for i, r in enumerate(rows):
+                pos.setdefault(r.get(key_field), i)
+            for row in new_rows:
+                i = pos.get(row.get(key_field))
+                if i is None:
+                    pos[row.get(key_field)] = len(rows)
+                    rows.append(row)
+                else:
+                    rows[i] = row
+            _write_csv(path, rows)
+
+    def version(self, path: Path):
+        return _current_stamp(path)
+
+    def mtime(self, path: Path) -> Optional[float]:
+        stamp = _current_stamp(path)
+        return stamp[0] / 1e9 if stamp else None
+
+
+class SqliteBackend:
+    """One table per CSV (same column names, all TEXT) in a WAL-mode database.
+
+    Applications are UNIQUE on (job_id, candidate_id), so a repeated
+    add_application is ignored rather than stored twice.  Every write also
+    bumps its table's row in `versions` in the same transaction, so an
+    application insert leaves the version of jobs (and everything cached on
+    it) alone.
+    """
+    name = "sqlite"
+
+    DDL = """
+    CREATE TABLE IF NOT EXISTS companies (
+        company_id TEXT PRIMARY KEY, name TEXT, email TEXT, location TEXT);
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY, title TEXT, description TEXT,
+        company_id TEXT, deadline TEXT, status TEXT);
+    CREATE TABLE IF NOT EXISTS candidates (
+        candidate_id TEXT PRIMARY KEY, first_name TEXT, last_name TEXT,
+        email TEXT, role TEXT);
+    CREATE TABLE IF NOT EXISTS applications (
+        job_id TEXT NOT NULL, candidate_id TEXT NOT NULL, applied_at TEXT,
+        UNIQUE (job_id, candidate_id));
+    CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company_id);
+    CREATE INDEX IF NOT EXISTS idx_applications_candidate ON applications(candidate_id);
+    CREATE TABLE IF NOT EXISTS versions (
+        name TEXT PRIMARY KEY, n INTEGER NOT NULL, modified REAL);
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._wal_path = Path(str(self.db_path) + "-wal")
+        self._seen = None  # (database file stamps, {table: (n, modified)})
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.DDL)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _table(path: Path) -> str:
+        return path.stem
+
+    @staticmethod
+    def _record(path: Path, r):
+        # columns come back in SCHEMAS order; NULL reads as blank, like CSV
+        return RECORD_TYPES[path](*(v or "" for v in r))
+
+    def _bump(self, conn: sqlite3.Connection, path: Path) -> None:
+        """Count a write to path's table (inside the writing transaction)."""
+        table = self._table(path)
+        conn.execute("INSERT OR IGNORE INTO versions (name, n, modified) VALUES (?, 0, NULL)", (table,))
+        conn.execute("UPDATE versions SET n = n + 1, modified = ? WHERE name = ?", (time.time(), table))
+
+    def _versions(self) -> Dict[str, tuple]:
+        # re-read only after the database files changed: every commit in WAL
+        # mode touches the -wal file, checkpoints touch the db
+        stamps = (_stamp(self.db_path), _stamp(self._wal_path))
+        seen = self._seen
+        if seen is not None and seen[0] == stamps:
+            return seen[1]
+        versions = {name: (n, modified) for name, n, modified in
+                    self._conn().execute("SELECT name, n, modified FROM versions")}
+        self._seen = (stamps, versions)
+        return versions
+
+    def rows(self, path: Path) -> List[Dict[str, str]]:
+        cur = self._conn().execute(f"SELECT * FROM {self._table(path)} ORDER BY rowid")
+        return [self._record(path, r) for r in cur]
+
+    def iter_rows(self, path: Path) -> Iterator[Dict[str, str]]:
+        cur = self._conn().execute(f"SELECT * FROM {self._table(path)} ORDER BY rowid")
+        for r in cur:
+            yield self._record(path, r)
+
+    def get(self, path: Path, field: str, value: str) -> Optional[Dict[str, str]]:
+        cur = self._conn().execute(
+            f"SELECT * FROM {self._table(path)} WHERE {field} = ? ORDER BY rowid LIMIT 1", (value,))
+        r = cur.fetchone()
+        return self._record(path, r) if r else None
+
+    def group(self, path: Path, field: str, value: str) -> List[Dict[str, str]]:
+        cur = self._conn().execute(
+            f"SELECT * FROM {self._table(path)} WHERE {field} = ? ORDER BY rowid", (value,))
+        return [self._record(path, r) for r in cur]
+
+    def counts(self, path: Path, field: str) -> Dict[str, int]:
+        return cached(f"counts:{path.stem}.{field}", (path,), lambda: Counter(dict(
+            self._conn().execute(
+                f"SELECT {field}, COUNT(*) FROM {self._table(path)} GROUP BY {field}"))))
+
+    def append(self, path: Path, rows: List[Dict[str, str]]) -> None:
+        cols = SCHEMAS[path]
+        sql = (f"INSERT OR IGNORE INTO {self._table(path)} ({','.join(cols)}) "
+               f"VALUES ({','.join('?' * len(cols))})")
+        conn = self._conn()
+        with conn:
+            if conn.executemany(sql, [[r.get(c, "") for c in cols] for r in rows]).rowcount:
+                self._bump(conn, path)
+
+    def exists(self, path: Path, fields: Tuple[str, ...], values: Tuple[str, ...]) -> bool:
+        where = " AND ".join(f"{f} = ?" for f in fields)
+        cur = self._conn().execute(
+            f"SELECT 1 FROM {self._table(path)} WHERE {where} LIMIT 1", tuple(values))
+        return cur.fetchone() is not None
+
+    def append_new(self, path: Path, fields: Tuple[str, ...],
+                   rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        # relies on a UNIQUE constraint over fields (applications has one)
+        cols = SCHEMAS[path]
+        sql = (f"INSERT OR IGNORE INTO {self._table(path)} ({','.join(cols)}) "
+               f"VALUES ({','.join('?' * len(cols))})")
+        conn = self._conn()
+        new = []
+        with conn:
+            for r in rows:
+                if conn.execute(sql, [r.get(c, "") for c in cols]).rowcount == 1:
+                    new.append(r)
+            if new:
+                self._bump(conn, path)
+        return new
+
+    def upsert(self, path: Path, key_field: str, new_rows: List[Dict[str, str]]) -> None:
+        table = self._table(path)
+        conn = self._conn()
+        with conn:
+            for row in new_rows:
+                cols = [c for c in SCHEMAS[path] if c in row]
+                cur = conn.execute(
+                    f"UPDATE {table} SET {', '.join(c + ' = ?' for c in cols)} WHERE {key_field} = ?",
+                    [row[c] for c in cols] + [row.get(key_field)])
+                if cur.rowcount == 0:
+                    conn.execute(
+                        f"INSERT INTO {table} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})",
+                        [row[c] for c in cols])
+            if new_rows:
+                self._bump(conn, path)
+
+    def version(self, path: Path):
+        # (write count, time of the last write) of this table alone
+        return self._versions().get(self._table(path), (0, None))
+
+    def mtime(self, path: Path) -> Optional[float]:
+        modified = self.version(path)[1]
+        if modified is not None:
+            return modified
+        # never written through the app: fall back to the database file
+        stamp = _stamp(self.db_path)
+        return stamp[0] / 1e9 if stamp else None
+
+
+def make_backend(kind: str, db_path: Optional[Path] = None):
+    if kind == "csv":
+        return CsvBackend()
+    if kind == "sqlite":
+        return SqliteBackend(db_path or SQLITE_DB)
+    raise ValueError(f"unknown storage backend: {kind!r}")
+
+_backend = make_backend(STORAGE)
+
+def _after_fork_in_child() -> None:
+    # A pre-forking server (see gunicorn.conf.py) forks after the data is
+    # loaded.  Locks another thread held at that moment would never be
+    # released in the child, and SQLite connections must not cross a fork.
+    global _held, _queue_lock
+    _thread_locks.clear()
+    _held = threading.local()
+    _queue_lock = threading.Lock()
+    if isinstance(_backend, SqliteBackend):
+        _backend._local = threading.local()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def use_backend(kind: str, db_path: Optional[Path] = None) -> None:
+    """Switch the storage backend used by the functions below."""
+    global _backend
+    _backend = make_backend(kind, db_path)
+
+def data_version(path: Path):
+    """Opaque token that changes whenever the given table changes."""
+    return _backend.version(path)
+
+def last_modified(*paths: Path) -> Optional[datetime]:
+    """Latest modification time (UTC) of the given tables, for HTTP caching."""
+    times = [t for t in (_backend.mtime(p) for p in paths) if t is not None]
+    if not times:
+        return None
+    return datetime.fromtimestamp(max(times), tz=timezone.utc)
+
+def import_csv_to_sqlite(db_path: Optional[Path] = None) -> Dict[str, int]:
+    """Copy the four CSV files into a SQLite database (existing rows are kept).
+
+    Returns the number of CSV rows read per table; blank rows are skipped.
+    """
+    db = SqliteBackend(db_path or SQLITE_DB)
+    counts = {}
+    for path, cols in SCHEMAS.items():
+        rows = [r for r in _read_csv(path) if any((r.get(c) or "").strip() for c in cols)]
+        if path == APPLICATIONS_CSV:
+            db.append(path, rows)
+        else:
+            key = cols[0]
+            conn = db._conn()
+            with conn:
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {path.stem} ({','.join(cols)}) "
+                    f"VALUES ({','.join('?' * len(cols))})",
+                    [[r.get(c, "") for c in cols] for r in rows if r.get(key)])
+                db._bump(conn, path)
+        counts[path.stem] = len(rows)
+    return counts
+
+# ---------- Derived data cache ----------
+# Lookup maps and aggregates computed from whole tables are memoized against
+# the data_version() of the tables they were built from.
+_derived: Dict[str, tuple] = {}
+
+def cached(name: str, paths, build, extra=()):
+    """build() memoized until a table in paths changes (or extra differs)."""
+    version = tuple(data_version(p) for p in paths) + (_backend.name,) + tuple(extra)
+    hit = _derived.get(name)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    value = build()
+    _derived[name] = (version, value)
+    return value
+
+def _by_key(rows: List[Dict[str, str]], field: str) -> Dict[str, Dict[str, str]]:
+    out = {}
+    for r in rows:
+        out.setdefault(r.get(field, ""), r)
+    return out
+
+def company_map() -> Dict[str, Dict[str,str]]:
+    """company_id -> company row (shared, read-only)"""
+    return cached("company_map", (COMPANIES_CSV,),
+                  lambda: _by_key(list_companies(), "company_id"))
+
+def job_map() -> Dict[str, Dict[str,str]]:
+    """job_id -> job row (shared, read-only)"""
+    return cached("job_map", (JOBS_CSV,), lambda: _by_key(list_jobs(), "job_id"))
+
+def candidate_map() -> Dict[str, Dict[str,str]]:
+    """candidate_id -> candidate row (shared, read-only)"""
+    return cached("candidate_map", (CANDIDATES_CSV,),
+                  lambda: _by_key(list_candidates(), "candidate_id"))
 
 # ---------- CRUD helpers ----------
 def list_companies() -> List[Dict[str,str]]:
-    return _read_csv(COMPANIES_CSV)
+    return _backend.rows(COMPANIES_CSV)
 
 def get_company(company_id: str) -> Optional[Dict[str,str]]:
-    for c in list_companies():
-        if c["company_id"] == company_id:
-            return c
-    return None
+    return _backend.get(COMPANIES_CSV, "company_id", company_id)
 
 def list_jobs(only_open: bool=False) -> List[Dict[str,str]]:
-    jobs = _read_csv(JOBS_CSV)
+    jobs = _backend.rows(JOBS_CSV)
     if only_open:
-        jobs = [j for j in jobs if j.get("status","").upper() == "OPEN"]
+        return [j for j in jobs if j.get("status","").upper() == "OPEN"]
     return jobs
 
 def get_job(job_id: str) -> Optional[Dict[str,str]]:
-    for j in list_jobs(only_open=False):
-        if j["job_id"] == job_id:
-            return j
-    return None
+    return _backend.get(JOBS_CSV, "job_id", job_id)
 
 def list_candidates() -> List[Dict[str,str]]:
-    return _read_csv(CANDIDATES_CSV)
+    return _backend.rows(CANDIDATES_CSV)
 
 def get_candidate(candidate_id: str) -> Optional[Dict[str,str]]:
-    for c in list_candidates():
-        if c["candidate_id"] == candidate_id:
-            return c
-    return None
+    return _backend.get(CANDIDATES_CSV, "candidate_id", candidate_id)
 
 def list_applications() -> List[Dict[str,str]]:
-    return _read_csv(APPLICATIONS_CSV)
+    return _backend.rows(APPLICATIONS_CSV)
+
+def iter_applications() -> Iterator[Dict[str,str]]:
+    """All applications in file order, one at a time (for exports)."""
+    return _backend.iter_rows(APPLICATIONS_CSV)
 
 def list_applications_by_candidate(candidate_id: str) -> List[Dict[str,str]]:
-    return [a for a in list_applications() if a["candidate_id"] == candidate_id]
+    return _backend.group(APPLICATIONS_CSV, "candidate_id", candidate_id)
 
 def list_applications_by_job(job_id: str) -> List[Dict[str,str]]:
-    return [a for a in list_applications() if a["job_id"] == job_id]
+    return _backend.group(APPLICATIONS_CSV, "job_id", job_id)
+
+def application_counts_by_job() -> Dict[str,int]:
+    """job_id -> number of applications (shared, read-only)"""
+    return _backend.counts(APPLICATIONS_CSV, "job_id")
 
 def add_application(job_id: str, candidate_id: str, applied_at: datetime) -> None:
-    apps = list_applications()
-    apps.append({
+    _backend.append(APPLICATIONS_CSV, [{
         "job_id": job_id,
         "candidate_id": candidate_id,
         "applied_at": applied_at.strftime("%Y-%m-%d %H:%M:%S")
-    })
-    _write_csv(APPLICATIONS_CSV, apps)
+    }])
+
+def add_applications(rows: List[Dict[str,str]]) -> None:
+    """Append many application rows (job_id, candidate_id, applied_at) in one write."""
+    if rows:
+        _backend.append(APPLICATIONS_CSV, rows)
+
+# (job_id, candidate_id) is the natural key of an application.  The CSV
+# backend keeps the set of pairs as a cache index (rebuilt when the file is
+# reloaded, extended by appends); SQLite enforces it with a UNIQUE constraint.
+APPLICATION_KEY = ("job_id", "candidate_id")
+
+def has_application(job_id: str, candidate_id: str) -> bool:
+    return _backend.exists(APPLICATIONS_CSV, APPLICATION_KEY, (job_id, candidate_id))
+
+def add_application_if_new(job_id: str, candidate_id: str, applied_at: datetime) -> bool:
+    """Atomically insert the application unless the pair exists; True if inserted."""
+    return bool(add_applications_if_new([{
+        "job_id": job_id,
+        "candidate_id": candidate_id,
+        "applied_at": applied_at.strftime("%Y-%m-%d %H:%M:%S")
+    }]))
+
+def add_applications_if_new(rows: List[Dict[str,str]]) -> List[Dict[str,str]]:
+    """Batch version of add_application_if_new; returns the rows actually written."""
+    if not rows:
+        return []
+    return _backend.append_new(APPLICATIONS_CSV, APPLICATION_KEY, rows)
 
 def upsert_row(path: Path, key_field: str, row: Dict[str,str]) -> None:
-    rows = _read_csv(path)
-    found = False
-    for i, r in enumerate(rows):
-        if r.get(key_field) == row.get(key_field):
-            rows[i] = row
-            found = True
-            break
-    if not found:
-        rows.append(row)
-    _write_csv(path, rows)
+    _backend.upsert(path, key_field, [row])
+
+def upsert_rows(path: Path, key_field: str, rows: List[Dict[str,str]]) -> None:
+    """upsert_row for many rows in a single write"""
+    if rows:
+        _backend.upsert(path, key_field, rows)
+
+# ---------- Deadlines ----------
+def job_deadlines() -> Dict[str, Optional[date]]:
+    """job_id -> parsed deadline (None if unparseable), built once per jobs version"""
+    def build():
+        out = {}
+        for j in list_jobs():
+            d = parse_date_ymd(j.get("deadline", ""))
+            out.setdefault(j.get("job_id", ""), d.date() if d else None)
+        return out
+    return cached("job_deadlines", (JOBS_CSV,), build)
+
+def open_job_ids(today: date) -> frozenset:
+    """ids of jobs with status OPEN whose deadline is today or later"""
+    def build():
+        deadlines = job_deadlines()
+        return frozenset(j["job_id"] for j in list_jobs(only_open=True)
+                         if deadlines.get(j["job_id"]) is not None
+                         and deadlines[j["job_id"]] >= today)
+    return cached("open_job_ids", (JOBS_CSV,), build, extra=(today,))
+
+def migrate_deadlines_to_iso() -> int:
+    """Rewrite job deadlines as YYYY-MM-DD; returns how many rows changed."""
+    changed = []
+    for j in list_jobs():
+        d = parse_date_ymd(j.get("deadline", ""))
+        if d is not None and j.get("deadline") != d.strftime(DATE_FMT):
+            changed.append({**j, "deadline": d.strftime(DATE_FMT)})
+    upsert_rows(JOBS_CSV, "job_id", changed)
+    return len(changed)
+
+def close_expired_jobs(today: date) -> List[str]:
+    """Set status CLOSED on OPEN jobs whose deadline is before today, in one
+    write; returns their ids.  Jobs with unparseable deadlines are left alone."""
+    with _locked(JOBS_CSV):
+        deadlines = job_deadlines()
+        changed = [{**j, "status": "CLOSED"} for j in list_jobs(only_open=True)
+                   if deadlines.get(j["job_id"]) is not None and deadlines[j["job_id"]] < today]
+        upsert_rows(JOBS_CSV, "job_id", changed)
+    return [j["job_id"] for j in changed]
 
 # ---------- Validation helpers ----------
 def is_valid_8digit_not0(s: str) -> bool:
@@ -119,7 +944,11 @@ def parse_date_ymd(s) -> Optional[datetime]:
         return None
     s = str(s).strip()          # ตัดช่องว่างหัวท้าย
     s10 = s[:10]                # เผื่อมีเวลาเกินมา ตัดเหลือ 10 ตัวแรก
+    return _parse_date10(s10)
 
+@lru_cache(maxsize=4096)
+def _parse_date10(s10: str) -> Optional[datetime]:
+    # the same few deadline strings repeat across every job, so strptime runs once per string
     for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y"):
         try:
             return datetime.strptime(s10, fmt)
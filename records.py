@@ -0,0 +1,162 @@
+
+# Typed, slotted row classes for the four tables.
+# A slotted record stores one value per column and no per-row key dict, which
+# is most of the memory of a csv.DictReader row.  Values are parsed once when
+# the table is loaded:
+#   rec.job_id   -> 10002001              (int)
+#   rec.deadline -> date(2025, 10, 1)     (date; applied_at is a datetime)
+#   rec.status   -> Status.OPEN           (a str enum, so == "OPEN" still holds)
+# A value is only converted when it converts back to exactly the same text;
+# anything else (legacy d/m/Y deadlines, blank ids, unknown statuses) is kept
+# as the raw string.
+#
+# During the migration records also behave like read-only dicts of the
+# original CSV text: rec["job_id"] == "10002001", rec.get(...), {**rec},
+# dict(rec) and csv.DictWriter all work as they did with dict rows.
+from collections.abc import Mapping
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, Iterable, List, Sequence
+
+class Status(str, Enum):
+    OPEN = "OPEN"
+    CLOSED = "CLOSED"
+    __str__ = str.__str__
+
+class Role(str, Enum):
+    USER = "USER"
+    ADMIN = "ADMIN"
+    __str__ = str.__str__
+
+def parse_id(s: str):
+    return int(s) if s.isascii() and s.isdigit() and s[0] != "0" else s
+
+# fromisoformat() also takes other ISO forms (week dates, offsets), so the
+# separators are checked first; with them in place the text is canonical.
+def parse_date(s: str):
+    if len(s) != 10 or s[4] != "-" or s[7] != "-":
+        return s
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        return s
+
+def parse_datetime(s: str):
+    if len(s) != 19 or s[4] != "-" or s[7] != "-" or s[10] != " " or s[13] != ":" or s[16] != ":":
+        return s
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        return s
+
+_STATUSES = Status._value2member_map_
+_ROLES = Role._value2member_map_
+
+class Record(Mapping):
+    """Base class: subclasses list their columns in FIELDS (= __slots__) and
+    take the column texts, in that order, as __init__ arguments.  Like the
+    cached dict rows before them, records are shared: treat them as read-only."""
+    __slots__ = ()
+    FIELDS: Sequence[str] = ()
+
+    @classmethod
+    def from_dict(cls, row: Mapping) -> "Record":
+        return cls(*(row.get(f) or "" for f in cls.FIELDS))
+
+    @classmethod
+    def from_values(cls, *values) -> "Record":
+        """Record from already-typed values, skipping the text parsing."""
+        rec = cls.__new__(cls)
+        for name, value in zip(cls.FIELDS, values):
+            setattr(rec, name, value)
+        return rec
+
+    @classmethod
+    def from_rows(cls, header: List[str], rows: Iterable[List[str]]) -> List["Record"]:
+        """Records from csv.reader rows given the file's header line.  Columns
+        missing from the file come out blank; blank lines are skipped."""
+        pos = [header.index(f) if f in header else None for f in cls.FIELDS]
+        out = []
+        if pos == list(range(len(cls.FIELDS))):
+            for row in rows:
+                if row:
+                    out.append(cls(*row))
+            return out
+        for row in rows:
+            if row:
+                out.append(cls(*(row[i] if i is not None and i < len(row) else "" for i in pos)))
+        return out
+
+    # -- read-only mapping of the CSV text --
+    def __getitem__(self, key: str) -> str:
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        v = getattr(self, key)
+        return v if v.__class__ is str else str(v)
+
+    def get(self, key: str, default=None):
+        if key not in self._FIELD_SET:
+            return default
+        v = getattr(self, key)
+        return v if v.__class__ is str else str(v)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELD_SET
+
+    def to_dict(self) -> Dict[str, str]:
+        return {f: self[f] for f in self.FIELDS}
+
+    def __reduce__(self):
+        return type(self), tuple(self[f] for f in self.FIELDS)
+
+    def __repr__(self) -> str:
+        body = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.FIELDS)
+        return f"{type(self).__name__}({body})"
+
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+class Company(Record):
+    __slots__ = FIELDS = ("company_id", "name", "email", "location")
+
+    def __init__(self, company_id="", name="", email="", location="", *_):
+        self.company_id = parse_id(company_id)
+        self.name = name
+        self.email = email
+        self.location = location
+
+class Job(Record):
+    __slots__ = FIELDS = ("job_id", "title", "description", "company_id", "deadline", "status")
+
+    def __init__(self, job_id="", title="", description="", company_id="", deadline="", status="", *_):
+        self.job_id = parse_id(job_id)
+        self.title = title
+        self.description = description
+        self.company_id = parse_id(company_id)
+        self.deadline = parse_date(deadline)
+        self.status = _STATUSES.get(status, status)
+
+class Candidate(Record):
+    __slots__ = FIELDS = ("candidate_id", "first_name", "last_name", "email", "role")
+
+    def __init__(self, candidate_id="", first_name="", last_name="", email="", role="", *_):
+        self.candidate_id = parse_id(candidate_id)
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+        self.role = _ROLES.get(role, role)
+
+class Application(Record):
+    __slots__ = FIELDS = ("job_id", "candidate_id", "applied_at")
+
+    def __init__(self, job_id="", candidate_id="", applied_at="", *_):
+        self.job_id = parse_id(job_id)
+        self.candidate_id = parse_id(candidate_id)
+        self.applied_at = parse_datetime(applied_at)
@@ -0,0 +1,112 @@
+
+# Background job that keeps jobs.csv's status column in step with deadlines.
+# Shortly after each local midnight (and once at start) every OPEN job whose
+# deadline has passed is set to CLOSED in a single write; the caches keyed on
+# jobs.csv's data version then refresh on their own.
+#   python scheduler.py           # standalone worker process
+#   python scheduler.py --once    # close expired jobs now and exit
+# The app servers can also run it as a daemon thread: `python view.py` starts
+# one, and under gunicorn (see gunicorn.conf.py) or an ASGI server (see
+# asgi.py) the first worker to take the scheduler lock file does.  Importing the app never starts it.  Set
+# JOBFAIR_SCHEDULER=off when the standalone worker is used instead.
+import argparse
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import model
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: no cross-process election
+    fcntl = None
+
+log = logging.getLogger("jobfair.scheduler")
+
+# seconds after midnight to run, so a clock a little behind still sees the new day
+RUN_AFTER_MIDNIGHT = 5
+# upper bound on one sleep, so a changed system clock is noticed within the hour
+MAX_SLEEP = 3600
+
+def run_once(today=None) -> list:
+    today = today or date.today()
+    closed = model.close_expired_jobs(today)
+    if closed:
+        log.info("closed %d expired jobs: %s", len(closed), ", ".join(closed))
+    return closed
+
+def seconds_until_next_run(now: datetime) -> float:
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + RUN_AFTER_MIDNIGHT
+
+class DeadlineScheduler(threading.Thread):
+    def __init__(self):
+        super().__init__(name="jobfair-deadlines", daemon=True)
+        self.stopped = threading.Event()
+
+    def run(self):
+        last = None
+        while not self.stopped.is_set():
+            today = date.today()
+            if today != last:
+                try:
+                    run_once(today)
+                    last = today
+                except Exception:
+                    log.exception("closing expired jobs failed; retrying later")
+            self.stopped.wait(min(seconds_until_next_run(datetime.now()), MAX_SLEEP))
+
+    def stop(self):
+        self.stopped.set()
+
+_thread = None
+_thread_lock = threading.Lock()
+
+def start_background():
+    """Start the scheduler thread for this process (once); returns it."""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = DeadlineScheduler()
+            _thread.start()
+        return _thread
+
+# held open (and flock'ed) by the one process that runs the thread
+LOCK_FILE = model.DATA_DIR / ".jobfair-scheduler.lock"
+_lock_file = None
+
+def start_singleton():
+    """Start the thread in this process unless another process on this data
+    directory already runs it; returns the thread or None."""
+    global _lock_file
+    with _thread_lock:
+        if _lock_file is None and fcntl is not None:
+            try:
+                f = open(LOCK_FILE, "a")
+            except OSError:
+                return None  # read-only data dir: nothing to write anyway
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return None
+            _lock_file = f
+    return start_background()
+
+def enabled() -> bool:
+    return os.environ.get("JOBFAIR_SCHEDULER", "thread").lower() != "off"
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Close jobs whose deadline has passed")
+    p.add_argument("--once", action="store_true", help="run once and exit")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if args.once:
+        print(f"closed {len(run_once())} jobs")
+        return
+    worker = DeadlineScheduler()
+    worker.run()  # in the foreground
+
+if __name__ == "__main__":
+    main()
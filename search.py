@@ -0,0 +1,147 @@
+
+# In-memory inverted index for free-text search (no external dependencies).
+# Latin-script text is split into lowercase words.  Thai is written without
+# spaces between words, so Thai runs are indexed as overlapping character
+# bigrams instead; a query then matches text containing the same bigrams,
+# which behaves like a substring search without needing a word dictionary.
+import bisect
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_THAI = "\u0e00-\u0e7f"  # Thai block
+_RUNS = re.compile(f"[{_THAI}]+|[^\\W{_THAI}_]+")
+
+# a trailing query word matches at most this many indexed words by prefix
+MAX_PREFIX_TERMS = 64
+
+def _is_thai(run: str) -> bool:
+    return "\u0e00" <= run[0] <= "\u0e7f"
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of text: Latin words, and bigrams of Thai runs."""
+    terms = []
+    for run in _RUNS.findall(text.casefold()):
+        if _is_thai(run) and len(run) > 1:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run)
+    return terms
+
+class InvertedIndex:
+    """term -> {doc id: weighted term frequency}, updated document by document.
+
+    Documents are tuples of text fields; weights gives each field's weight in
+    the same order (e.g. a title hit counts more than a description hit).
+    sync() only re-tokenizes documents whose fields changed.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        self.weights = tuple(weights)
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._fields: Dict[str, tuple] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._vocab: Optional[List[str]] = None  # sorted terms, for prefix lookups
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _add(self, doc_id: str, fields: tuple) -> None:
+        tf = Counter()
+        for text, weight in zip(fields, self.weights):
+            for term in tokenize(text or ""):
+                tf[term] += weight
+        for term, w in tf.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocab = None
+            postings[doc_id] = w
+        self._fields[doc_id] = fields
+        self._terms[doc_id] = tuple(tf)
+
+    def _remove(self, doc_id: str) -> None:
+        for term in self._terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._vocab = None
+        self._fields.pop(doc_id, None)
+
+    def sync(self, docs: Dict[str, tuple]) -> int:
+        """Make the index hold exactly docs; returns how many were (re)indexed or dropped."""
+        with self._lock:
+            gone = [d for d in self._fields if d not in docs]
+            for doc_id in gone:
+                self._remove(doc_id)
+            changed = len(gone)
+            for doc_id, fields in docs.items():
+                if self._fields.get(doc_id) != fields:
+                    self._remove(doc_id)
+                    self._add(doc_id, fields)
+                    changed += 1
+            return changed
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        i = bisect.bisect_left(self._vocab, prefix)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix) and len(out) < MAX_PREFIX_TERMS:
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        """(doc id, score) of documents matching every query term, best first.
+
+        The last Latin word of the query, and any lone Thai character, also
+        match indexed terms they are a prefix of (search-as-you-type).
+        """
+        runs = _RUNS.findall(query.casefold())
+        groups = []
+        for n, run in enumerate(runs):
+            if _is_thai(run):
+                if len(run) == 1:
+                    groups.append(self._prefix_group(run))
+                else:
+                    groups.extend([run[i:i + 2]] for i in range(len(run) - 1))
+            elif n == len(runs) - 1:
+                groups.append(self._prefix_group(run))
+            else:
+                groups.append([run])
+        if not groups:
+            return []
+        with self._lock:
+            n_docs = len(self._fields) or 1
+            # a doc's score for a group is its best-scoring alternative term
+            scored = []
+            for terms in groups:
+                best: Dict[str, float] = {}
+                for term in terms:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1.0 + n_docs / len(postings))
+                    for doc_id, w in postings.items():
+                        s = idf * w / (w + 1.2)
+                        if s > best.get(doc_id, 0.0):
+                            best[doc_id] = s
+                if not best:
+                    return []
+                scored.append(best)
+        scored.sort(key=len)
+        result = dict(scored[0])
+        for best in scored[1:]:
+            result = {d: s + best[d] for d, s in result.items() if d in best}
+            if not result:
+                return []
+        return sorted(result.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def _prefix_group(self, prefix: str) -> List[str]:
+        with self._lock:
+            return self._prefixed(prefix) or [prefix]
@@ -1,5 +1,12 @@
 
 # Creates sample CSV data for the Job Fair MVC (CSV) app.
+# Without options it writes the small demo set (2 companies, 11 jobs,
+# 10 candidates + 1 admin, 12 applications).  For scale testing, e.g.:
+#   python seed_data.py --companies 1000 --jobs 50000 --candidates 200000 \
+#       --applications 1000000 --days 60 --skew 1.1 --seed 42 --out /tmp/jobfair
+# Deadlines and applied_at are relative to the current time; add e.g.
+# --now 2025-10-01 to get byte-identical files for a seed on any day.
+import argparse
 import csv, random
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -18,13 +25,6 @@ def gen_8digit(n, nozero=True):
         s = "1" + s[1:]
     return s
 
-# Companies
-companies = [
-    {"company_id":"10000001","name":"Alpha Tech Co., Ltd.","email":"hr@alphatech.co","location":"Bangkok"},
-    {"company_id":"10000002","name":"Beta Solutions PLC","email":"jobs@betasolutions.com","location":"Chiang Mai"},
-]
-
-# Jobs (>=10 across 2 companies)
 titles = [
     "Software Engineer (Backend)",
     "Software Engineer (Frontend)",
@@ -38,53 +38,119 @@ titles = [
     "Data Engineer",
     "Security Analyst",
 ]
-jobs = []
-today = datetime.now().date()
-for i, t in enumerate(titles, start=1):
-    cid = companies[i % 2]["company_id"]
-    deadline = today + timedelta(days=7 + i)  # all open by default
-    jobs.append({
-        "job_id": gen_8digit(2000+i),
-        "title": t,
-        "description": f"{t} – responsibilities include collaborating with cross-functional teams.",
-        "company_id": cid,
-        "deadline": str(deadline),
-        "status": "OPEN" if i % 5 != 0 else "CLOSED"  # a few closed
-    })
+firsts = ["Anya","Ben","Chai","Dao","Ek","Fah","Gao","Hana","Ice","Jane"]
+lasts  = ["Wong","Smith","Prasert","Nok","Kitti","Chan","Manee","Sato","Kim","Doe"]
+demo_companies = [
+    {"company_id":"10000001","name":"Alpha Tech Co., Ltd.","email":"hr@alphatech.co","location":"Bangkok"},
+    {"company_id":"10000002","name":"Beta Solutions PLC","email":"jobs@betasolutions.com","location":"Chiang Mai"},
+]
+locations = ["Bangkok","Chiang Mai","Khon Kaen","Phuket","Chon Buri","Songkhla"]
+
+def make_companies(n):
+    for i in range(1, n + 1):
+        if i <= len(demo_companies):
+            yield demo_companies[i - 1]
+        else:
+            yield {"company_id": gen_8digit(i), "name": f"Company {i} Co., Ltd.",
+                   "email": f"hr@company{i}.example.com", "location": locations[i % len(locations)]}
+
+def make_jobs(n, n_companies, spread, today):
+    jobs = []
+    for i in range(1, n + 1):
+        t = titles[(i - 1) % len(titles)]
+        if i > len(titles):
+            t = f"{t} #{(i - 1) // len(titles) + 1}"
+        deadline = today + timedelta(days=7 + 1 + (i - 1) % spread)  # all open by default
+        jobs.append({
+            "job_id": gen_8digit(2000+i),
+            "title": t,
+            "description": f"{t} – responsibilities include collaborating with cross-functional teams.",
+            "company_id": gen_8digit(1 + i % n_companies),
+            "deadline": str(deadline),
+            "status": "OPEN" if i % 5 != 0 else "CLOSED"  # a few closed
+        })
+    return jobs
+
+def make_candidates(n):
+    # n regular candidates, then 1 admin
+    for i in range(n + 1):
+        if i == n:
+            first, last, email, role = "Admin", "User", "admin.user@example.com", "ADMIN"
+        elif i < len(firsts):
+            first, last, role = firsts[i], lasts[i], "USER"
+            email = (first + "." + last + "@example.com").lower()
+        else:
+            first, last, role = firsts[i % len(firsts)], lasts[(i // len(firsts)) % len(lasts)], "USER"
+            email = f"{first}.{last}.{i}@example.com".lower()
+        yield {"candidate_id": gen_8digit(3000+i), "first_name": first, "last_name": last,
+               "email": email, "role": role}
+
+def make_applications(n, jobs, n_candidates, days, skew, rnd, now):
+    """n applications spread over the last `days` days.  Job popularity
+    follows a Zipf-like curve (weight 1/rank**skew; skew=0 is uniform)."""
+    open_jobs = [j["job_id"] for j in jobs if j["status"] == "OPEN"]
+    if not open_jobs or n_candidates == 0:
+        return
+    cum, total = [], 0.0
+    for rank in range(1, len(open_jobs) + 1):
+        total += 1.0 / rank ** skew
+        cum.append(total)
+    # keep (job, candidate) pairs unique, like the app does
+    seen = set()
+    made = tries = 0
+    while made < n and tries < n * 20:
+        tries += 1
+        j = rnd.choices(range(len(open_jobs)), cum_weights=cum)[0]
+        c = rnd.randrange(n_candidates)  # exclude admin (the last candidate)
+        pair = j * n_candidates + c
+        if pair in seen:
+            continue
+        seen.add(pair)
+        made += 1
+        applied_at = now - timedelta(seconds=rnd.randrange(days * 86400)) if days else now
+        yield {
+            "job_id": open_jobs[j],
+            "candidate_id": gen_8digit(3000+c),
+            "applied_at": applied_at.strftime("%Y-%m-%d %H:%M:%S")
+        }
 
-# Candidates (>=10) + 1 admin
-firsts = ["Anya","Ben","Chai","Dao","Ek","Fah","Gao","Hana","Ice","Jane","Admin"]
-lasts  = ["Wong","Smith","Prasert","Nok","Kitti","Chan","Manee","Sato","Kim","Doe","User"]
-cands = []
-for i in range(11):
-    cid = gen_8digit(3000+i)
-    role = "ADMIN" if i == 10 else "USER"
-    cands.append({
-        "candidate_id": cid,
-        "first_name": firsts[i],
-        "last_name": lasts[i],
-        "email": (firsts[i] + "." + lasts[i] + "@example.com").lower(),
-        "role": role
-    })
+def generate(out_dir=DATA_DIR, companies=2, jobs=11, candidates=10, applications=12,
+             days=0, skew=0.0, seed=None, now=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    now = now or datetime.now().replace(microsecond=0)
+    job_rows = make_jobs(jobs, companies, max(days, len(titles)), now.date())
+    write(out_dir/"companies.csv", make_companies(companies), ["company_id","name","email","location"])
+    write(out_dir/"jobs.csv", job_rows, ["job_id","title","description","company_id","deadline","status"])
+    write(out_dir/"candidates.csv", make_candidates(candidates), ["candidate_id","first_name","last_name","email","role"])
+    write(out_dir/"applications.csv",
+          make_applications(applications, job_rows, candidates, days, skew, rnd, now),
+          ["job_id","candidate_id","applied_at"])
+    return out_dir
 
-# Applications (some random existing)
-apps = []
-for i in range(12):
-    c = random.choice(cands[:-1])  # exclude admin from random
-    j = random.choice([j for j in jobs if j["status"]=="OPEN"])
-    apps.append({
-        "job_id": j["job_id"],
-        "candidate_id": c["candidate_id"],
-        "applied_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Generate Job Fair CSV data")
+    p.add_argument("--companies", type=int, default=2)
+    p.add_argument("--jobs", type=int, default=11)
+    p.add_argument("--candidates", type=int, default=10, help="regular candidates (an admin is added)")
+    p.add_argument("--applications", type=int, default=12)
+    p.add_argument("--days", type=int, default=0, help="spread applied_at over the last N days")
+    p.add_argument("--skew", type=float, default=0.0, help="Zipf exponent of job popularity (0 = uniform)")
+    p.add_argument("--seed", type=int, help="random seed for reproducible data")
+    p.add_argument("--now", type=datetime.fromisoformat,
+                   help="base date/time for deadlines and applied_at, e.g. 2025-10-01 (default: now)")
+    p.add_argument("--out", default=str(DATA_DIR), help="output directory")
+    args = p.parse_args(argv)
 
-write(DATA_DIR/"companies.csv", companies, ["company_id","name","email","location"])
-write(DATA_DIR/"jobs.csv", jobs, ["job_id","title","description","company_id","deadline","status"])
-write(DATA_DIR/"candidates.csv", cands, ["candidate_id","first_name","last_name","email","role"])
-write(DATA_DIR/"applications.csv", apps, ["job_id","candidate_id","applied_at"])
+    out = generate(args.out, args.companies, args.jobs, args.candidates, args.applications,
+                   args.days, args.skew, args.seed, args.now)
+    admin_id = gen_8digit(3000 + args.candidates)
+    print("Seeded sample CSVs in", out)
+    print("- companies.csv")
+    print("- jobs.csv")
+    print("- candidates.csv (use Admin user to login: candidate_id =", admin_id, ", email = admin.user@example.com )")
+    print("- applications.csv")
 
-print("Seeded sample CSVs in", DATA_DIR)
-print("- companies.csv")
-print("- jobs.csv")
-print("- candidates.csv (use Admin user to login: candidate_id =", cands[-1]["candidate_id"], ", email =", cands[-1]["email"], ")")
-print("- applications.csv")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+
+# Columnar, memory-mapped snapshot of applications.csv for fast cold starts.
+#
+# Parsing a large applications.csv takes seconds; the snapshot stores the same
+# rows as flat arrays that are mmap'ed on open, so a new process can answer
+# "applications of candidate X", "applicants per job" and "has X applied to Y"
+# without parsing or even touching most of the file.
+#
+# Layout (native byte order; it is a local cache, not an exchange format):
+#   b"JFSNAP01", u64 offset of the metadata, u64 its length
+#   uint32 columns  job, candidate        -- codes into the id tables
+#   int64  column   applied_at            -- YYYYMMDDHHMMSS, -1 = see "odd"
+#   uint32 order + offsets per id column  -- row numbers grouped by id (CSR)
+#   JSON metadata: id tables, odd applied_at texts, section offsets, and the
+#   CSV's device/inode/size plus its last bytes at snapshot time
+#
+# The CSV is append-only between compactions, so a snapshot stays usable
+# while the file keeps the same inode and still holds the same bytes where
+# the snapshot ended; rows after that point are parsed from the CSV tail.
+import csv
+import io
+import json
+import mmap
+import os
+import stat
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from records import Application, parse_id
+
+MAGIC = b"JFSNAP01"
+_HEAD = struct.Struct("<8sQQ")
+KEY_FIELDS = ("job_id", "candidate_id")
+# bytes of the CSV kept in the metadata to detect in-place rewrites
+PROBE_BYTES = 64
+
+def snapshot_path(csv_path: Path) -> Path:
+    return csv_path.with_suffix(".snap")
+
+def source_of(csv_path: Path, size: int) -> dict:
+    """Identity of the first `size` bytes of the CSV, as stored in a snapshot."""
+    st = os.stat(csv_path)
+    with open(csv_path, "rb") as f:
+        f.seek(max(0, size - PROBE_BYTES))
+        probe = f.read(min(size, PROBE_BYTES))
+    return {"dev": st.st_dev, "ino": st.st_ino, "size": size, "probe": probe.hex()}
+
+def _pack_time(dt) -> int:
+    return (dt.year * 10000000000 + dt.month * 100000000 + dt.day * 1000000
+            + dt.hour * 10000 + dt.minute * 100 + dt.second)
+
+def _unpack_time(v: int) -> datetime:
+    v, second = divmod(v, 100)
+    v, minute = divmod(v, 100)
+    v, hour = divmod(v, 100)
+    v, day = divmod(v, 100)
+    year, month = divmod(v, 100)
+    return datetime(year, month, day, hour, minute, second)
+
+def _grouped(col: array, n_codes: int) -> Tuple[array, array]:
+    """(row numbers ordered by code, offsets[code]..offsets[code+1] into them);
+    a counting sort, so rows of one code stay in file order."""
+    counts = [0] * n_codes
+    for c in col:
+        counts[c] += 1
+    offsets = array("I", [0]) * (n_codes + 1)
+    total = 0
+    for c, k in enumerate(counts):
+        offsets[c] = total
+        total += k
+    offsets[n_codes] = total
+    nxt = list(offsets[:n_codes])
+    order = array("I", [0]) * len(col)
+    for i, c in enumerate(col):
+        order[nxt[c]] = i
+        nxt[c] += 1
+    return order, offsets
+
+def write(csv_path: Path, rows: Sequence[Application], source: dict) -> Path:
+    """Write the snapshot of rows (all of the CSV's first source["size"] bytes)."""
+    tables: Dict[str, Dict[str, int]] = {f: {} for f in KEY_FIELDS}
+    cols = {f: array("I") for f in KEY_FIELDS}
+    times = array("q")
+    odd = {}
+    for i, r in enumerate(rows):
+        for f in KEY_FIELDS:
+            codes = tables[f]
+            text = r[f]
+            code = codes.get(text)
+            if code is None:
+                code = codes[text] = len(codes)
+            cols[f].append(code)
+        at = r.applied_at
+        if isinstance(at, datetime):
+            times.append(_pack_time(at))
+        else:
+            times.append(-1)
+            odd[str(i)] = at
+    sections = [("job_id", cols["job_id"]), ("candidate_id", cols["candidate_id"]),
+                ("applied_at", times)]
+    for f in KEY_FIELDS:
+        order, offsets = _grouped(cols[f], len(tables[f]))
+        sections += [(f + ".order", order), (f + ".offsets", offsets)]
+
+    path = snapshot_path(csv_path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        # readable by whoever can read the CSV (mkstemp creates it 0600)
+        os.chmod(tmp, stat.S_IMODE(os.stat(csv_path).st_mode))
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEAD.pack(MAGIC, 0, 0))
+            layout = {}
+            for name, arr in sections:
+                f.write(b"\0" * (-f.tell() % 8))
+                layout[name] = [f.tell(), arr.typecode, len(arr)]
+                arr.tofile(f)
+            meta = json.dumps({
+                "byteorder": sys.byteorder, "rows": len(times), "source": source,
+                "ids": {fld: list(tables[fld]) for fld in KEY_FIELDS},
+                "odd": odd, "sections": layout,
+            }, ensure_ascii=False).encode("utf-8")
+            meta_at = f.tell()
+            f.write(meta)
+            f.seek(0)
+            f.write(_HEAD.pack(MAGIC, meta_at, len(meta)))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
+
+class Snapshot:
+    """A memory-mapped snapshot; see the module comment."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_at, meta_len = _HEAD.unpack_from(self._mm)
+        if magic != MAGIC or not meta_at:
+            raise ValueError(f"{path.name}: not a snapshot")
+        meta = json.loads(self._mm[meta_at:meta_at + meta_len].decode("utf-8"))
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path.name}: written on another platform")
+        self.n = meta["rows"]
+        self.source = meta["source"]
+        view = memoryview(self._mm)
+        self._col = {}
+        for name, (offset, typecode, count) in meta["sections"].items():
+            size = array(typecode).itemsize
+            self._col[name] = view[offset:offset + count * size].cast(typecode)
+        self._ids = meta["ids"]                       # code -> id text
+        self._codes = {f: {t: c for c, t in enumerate(ids)} for f, ids in self._ids.items()}
+        self._typed = {f: [parse_id(t) for t in ids] for f, ids in self._ids.items()}
+        self._odd = {int(i): t for i, t in meta["odd"].items()}
+
+    def covers(self, csv_path: Path) -> bool:
+        """True if the CSV still starts with exactly the bytes snapshotted."""
+        src = self.source
+        try:
+            st = os.stat(csv_path)
+            if (st.st_dev, st.st_ino) != (src["dev"], src["ino"]) or st.st_size < src["size"]:
+                return False
+            return source_of(csv_path, src["size"])["probe"] == src["probe"]
+        except OSError:
+            return False
+
+    def tail(self, csv_path: Path) -> List[Application]:
+        """Rows appended to the CSV after the snapshot was taken."""
+        with open(csv_path, "rb") as f:
+            header = next(csv.reader(io.TextIOWrapper(f, encoding="utf-8", newline="")), None)
+        with open(csv_path, "rb") as f:
+            f.seek(self.source["size"])
+            data = f.read()
+        if not data or header is None:
+            return []
+        text = io.StringIO(data.decode("utf-8"), newline="")
+        return Application.from_rows(header, csv.reader(text))
+
+    # ---------- Rows ----------
+    def record(self, i: int) -> Application:
+        at = self._col["applied_at"][i]
+        return Application.from_values(
+            self._typed["job_id"][self._col["job_id"][i]],
+            self._typed["candidate_id"][self._col["candidate_id"][i]],
+            _unpack_time(at) if at >= 0 else self._odd[i])
+
+    def rows(self) -> List[Application]:
+        return [self.record(i) for i in range(self.n)]
+
+    def _rows_of(self, field: str, value: str) -> memoryview:
+        code = self._codes[field].get(value)
+        if code is None:
+            return self._col[field + ".order"][0:0]
+        offsets = self._col[field + ".offsets"]
+        return self._col[field + ".order"][offsets[code]:offsets[code + 1]]
+
+    def group(self, field: str, value: str) -> List[Application]:
+        """Rows whose field (job_id or candidate_id) equals value, in file order."""
+        return [self.record(i) for i in self._rows_of(field, value)]
+
+    def counts(self, field: str) -> Counter:
+        offsets = self._col[field + ".offsets"]
+        return Counter({t: offsets[c + 1] - offsets[c] for c, t in enumerate(self._ids[field])})
+
+    def has(self, job_id: str, candidate_id: str) -> bool:
+        jc = self._codes["job_id"].get(job_id)
+        cc = self._codes["candidate_id"].get(candidate_id)
+        if jc is None or cc is None:
+            return False
+        # scan the shorter of the two groups
+        by_job = self._rows_of("job_id", job_id)
+        by_cand = self._rows_of("candidate_id", candidate_id)
+        if len(by_cand) <= len(by_job):
+            col = self._col["job_id"]
+            return any(col[i] == jc for i in by_cand)
+        col = self._col["candidate_id"]
+        return any(col[i] == cc for i in by_job)
+
+def open_for(csv_path: Path) -> Optional[Snapshot]:
+    """The CSV's snapshot if there is one that still matches it, else None."""
+    path = snapshot_path(csv_path)
+    try:
+        snap = Snapshot(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    return snap if snap.covers(csv_path) else None
+
+# ---------- Index views for model's cache ----------
+# Stand-ins for the dict/set indexes model builds over a loaded table: they
+# answer from the snapshot plus the rows added after it, and accept new rows
+# the same way the real indexes do (see model._index_rows).
+class Groups:
+    """field value -> rows, like model._group_index"""
+
+    def __init__(self, snap: Snapshot, field: str, tail: Iterable):
+        self.snap, self.field = snap, field
+        self.extra: Dict[str, list] = {}
+        for r in tail:
+            self.extra.setdefault(r.get(field, ""), []).append(r)
+
+    def get(self, value: str, default=None):
+        rows = self.snap.group(self.field, value) + self.extra.get(value, [])
+        return rows if rows else default
+
+    def setdefault(self, value: str, default):
+        return self.extra.setdefault(value, default)
+
+class KeySet:
+    """(job_id, candidate_id) pairs, like model._key_set"""
+
+    def __init__(self, snap: Snapshot, tail: Iterable):
+        self.snap = snap
+        self.extra = {(r.get("job_id", ""), r.get("candidate_id", "")) for r in tail}
+
+    def __contains__(self, key) -> bool:
+        return key in self.extra or self.snap.has(*key)
+
+    def add(self, key) -> None:
+        self.extra.add(key)
@@ -0,0 +1,109 @@
+
+# In-process guards for write endpoints: a per-key token-bucket rate limiter,
+# coalescing of identical calls that are in flight at the same moment, and a
+# short-lived memory of results for idempotent retries.
+#
+# State lives in the worker process; with several gunicorn workers each one
+# keeps its own buckets, so the effective limit is per worker.  That is enough
+# to shed double-clicks and retry storms, which land on one keep-alive
+# connection (and so one worker) far more often than not.
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+class TokenBucket:
+    """Allow `burst` calls per key at once, refilled at `rate` per second."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._state = {}  # key -> (tokens, monotonic time of last update)
+        self._lock = threading.Lock()
+
+    def take(self, key: Hashable, now: float = None) -> float:
+        """Take one token for key: 0.0 if there was one, else the seconds until
+        there will be (nothing is taken then)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._state.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens < 1:
+                self._state[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._state[key] = (tokens - 1, now)
+            if len(self._state) > self.max_keys:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now: float) -> None:
+        # a bucket that has had time to refill is the same as no bucket
+        refill = self.burst / self.rate
+        self._state = {k: v for k, v in self._state.items() if now - v[1] < refill}
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run fn once per key at a time: callers arriving while a call for the
+    same key is running wait for it and get its result (or its exception)."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+class RecentResults:
+    """Results remembered for `ttl` seconds, at most `maxsize` of them."""
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # key -> (expires, value), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                return default
+            return item[1]
+
+    def put(self, key: Hashable, value) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (now + self.ttl, value)
+            while self._items:
+                oldest = next(iter(self._items.values()))
+                if oldest[0] > now and len(self._items) <= self.maxsize:
+                    break
+                self._items.popitem(last=False)
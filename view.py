@@ -1,14 +1,42 @@
 
-from flask import Flask, request, session, redirect, url_for, render_template_string, flash
+from flask import (Flask, Response, g, request, session, redirect, url_for, render_template,
+                   flash, get_flashed_messages, stream_with_context)
+from jinja2 import DictLoader
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+import api
 import controller
+import metrics
 import model
-from datetime import datetime
+import scheduler
+from collections import OrderedDict
+from datetime import date, datetime
+import csv
+import hashlib
+import io
+import os
+import secrets
+import threading
 
 app = Flask(__name__)
 app.secret_key = "dev-key-for-assignment"  # for demo only
+app.register_blueprint(api.bp)
+
+# time CSV I/O and every controller function (see /admin/metrics)
+metrics.instrument(model, ["_read_csv", "_read_records", "_write_csv"])
+metrics.instrument(controller)
+
+# template output pieces grouped per chunk when a page is streamed
+STREAM_BUFFER_ROWS = 64
+# rows per chunk of a streamed export
+EXPORT_CHUNK_ROWS = 1000
 
 # ---------- Templates (inline to keep one-file simplicity) ----------
-LAYOUT = """
+# Served through a DictLoader so Jinja compiles each one once and caches it,
+# instead of re-parsing a template string on every request.
+TEMPLATES = {}
+
+TEMPLATES["layout.html"] = """
 <!doctype html>
 <html lang="th">
 <head>
@@ -50,19 +78,263 @@ LAYOUT = """
 {% for m in get_flashed_messages() %}
   <div class="flash">{{ m }}</div>
 {% endfor %}
-{{ body|safe }}
+{% block body %}{% endblock %}
 </body>
 </html>
 """
 
-def render(body, **ctx):
-    user = session.get("user")
-    is_admin = user and user.get("role","").upper() == "ADMIN"
-    return render_template_string(LAYOUT, body=body, current_user=user, is_admin=is_admin, **ctx)
+TEMPLATES["macros.html"] = """
+{% macro status_pill(status) -%}
+  {% if status|upper == "OPEN" %}<span class='pill open'>เปิดรับ</span>{% else %}<span class='pill closed'>ปิดรับ</span>{% endif %}
+{%- endmacro %}
+
+{% macro pager(first_url, next_url) -%}
+  {% if first_url or next_url %}
+  <div class="muted" style="margin-top:8px;">
+    {% if first_url %}<a href="{{ first_url }}">« หน้าแรก</a>{% endif %}
+    {% if next_url %}<a href="{{ next_url }}">หน้าถัดไป »</a>{% endif %}
+  </div>
+  {% endif %}
+{%- endmacro %}
+"""
+
+TEMPLATES["login.html"] = """{% extends "layout.html" %}
+{% block body %}
+    <div class="card">
+      <h3>เข้าสู่ระบบ</h3>
+      <form method="post">
+        <label>รหัสผู้ใช้ (8 หลัก):<br><input name="candidate_id" required maxlength="8"></label><br><br>
+        <label>อีเมล:<br><input name="email" type="email" required></label><br><br>
+        <button class="btn btn-primary" type="submit">เข้าสู่ระบบ</button>
+      </form>
+      <p class="muted">* สำหรับเดโม่: ดูรายชื่อและอีเมลจากไฟล์ candidates.csv</p>
+    </div>
+{% endblock %}
+"""
+
+TEMPLATES["jobs_table.html"] = """{% from "macros.html" import status_pill, pager %}
+    <div class="card">
+      <h3>ตำแหน่งงานที่เปิดรับ</h3>
+      <form method="get" action="{{ url_for('jobs') }}" style="margin-bottom:8px;">
+        <input name="q" value="{{ q }}" placeholder="ค้นหาตำแหน่ง บริษัท หรือรายละเอียดงาน" maxlength="200" size="40">
+        <button class="btn" type="submit">ค้นหา</button>
+        {% if q %}<a href="{{ url_for('jobs') }}">ล้างการค้นหา</a>{% endif %}
+      </form>
+      {% if q %}
+      <div class="muted">ผลการค้นหา "{{ q }}" (เรียงตามความเกี่ยวข้อง)</div>
+      {% else %}
+      <div class="muted">จัดเรียง:
+        <a href="{{ url_for('jobs', sort='title') }}">ชื่อตำแหน่ง</a> · 
+        <a href="{{ url_for('jobs', sort='company') }}">ชื่อบริษัท</a> · 
+        <a href="{{ url_for('jobs', sort='deadline') }}">วันปิดรับ</a>
+      </div>
+      {% endif %}
+      <table>
+        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>วันปิดรับ</th><th class="right">การทำงาน</th></tr></thead>
+        <tbody>
+        {% for j in jobs %}
+            <tr>
+              <td>{{ j.title }}</td>
+              <td>{{ companies.get(j['company_id'], '') }}</td>
+              <td>{{ j.deadline }}</td>
+              <td class="right">
+                <button class="btn" type="submit" form="apply-form"
+                        formaction="{{ url_for('apply', job_id=j.job_id) }}">สมัคร</button>
+                {{ status_pill(j.status) }}
+              </td>
+            </tr>
+        {% else %}
+            {% if q %}<tr><td colspan="4" class="muted">ไม่พบตำแหน่งงานที่ตรงกับคำค้นหา</td></tr>{% endif %}
+        {% endfor %}
+        </tbody>
+      </table>
+      {{ pager(first_url, next_url) }}
+    </div>
+"""
+
+TEMPLATES["jobs.html"] = """{% extends "layout.html" %}
+{% from "macros.html" import status_pill %}
+{% block body %}
+    <form id="apply-form" method="post"><input type="hidden" name="idempotency_key" value="{{ form_key }}"></form>
+    {{ job_table }}
+    {% if counts is not none %}
+    <div class="card">
+      <h3>ภาพรวมตำแหน่งงาน (แอดมิน)</h3>
+      <table>
+        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>ปิดรับ</th><th>สถานะ</th><th class="right">จำนวนผู้สมัคร</th></tr></thead>
+        <tbody>
+        {% for r in counts %}
+          <tr><td>{{ r.title }}</td><td>{{ r.company }}</td><td>{{ r.deadline }}</td><td>{{ status_pill(r.status) }}</td><td class='right'>{{ r.applicants }}</td></tr>
+        {% endfor %}
+        </tbody>
+      </table>
+    </div>
+    <div class="card">
+      <h3>ส่งออกใบสมัคร (แอดมิน)</h3>
+      <form method="get" action="{{ url_for('admin_export_applications') }}">
+        <label>รหัสงาน <input name="job_id" maxlength="8" size="10"></label>
+        <label>รหัสบริษัท <input name="company_id" maxlength="8" size="10"></label>
+        <label>ตั้งแต่ <input name="since" type="date"></label>
+        <label>ถึง <input name="until" type="date"></label>
+        <select name="format"><option value="csv">CSV</option><option value="jsonl">JSON Lines</option></select>
+        <button class="btn" type="submit">ดาวน์โหลด</button>
+      </form>
+    </div>
+    {% endif %}
+{% endblock %}
+"""
+
+TEMPLATES["applications_table.html"] = """
+      <table>
+        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>วันที่สมัคร</th></tr></thead>
+        <tbody>
+        {% for a in apps %}
+          <tr><td>{{ a.title }}</td><td>{{ a.company }}</td><td>{{ a.applied_at }}</td></tr>
+        {% endfor %}
+        </tbody>
+      </table>
+"""
+
+TEMPLATES["profile.html"] = """{% extends "layout.html" %}
+{% from "macros.html" import pager %}
+{% block body %}
+    <div class="card">
+      <h3>ประวัติผู้สมัคร: {{ cand.first_name }} {{ cand.last_name }}</h3>
+      <p class="muted">อีเมล: {{ cand.email }}</p>
+      <div class="muted">เรียงตาม: 
+        <a href="{{ url_for('my_profile', sort='title') }}">ชื่อตำแหน่ง</a> · 
+        <a href="{{ url_for('my_profile', sort='company') }}">ชื่อบริษัท</a> · 
+        <a href="{{ url_for('my_profile', sort='applied_at') }}">วันที่สมัคร</a>
+      </div>
+      {% include "applications_table.html" %}
+      {{ pager(first_url, next_url) }}
+    </div>
+{% endblock %}
+"""
+
+TEMPLATES["admin_candidates.html"] = """{% extends "layout.html" %}
+{% from "macros.html" import pager %}
+{% block body %}
+    <div class="card">
+      <h3>ผู้สมัครทั้งหมด (เรียงตามชื่อ)</h3>
+      <table>
+        <thead><tr><th>ชื่อ-นามสกุล</th><th>อีเมล</th><th>สิทธิ์</th></tr></thead>
+        <tbody>
+        {% for c in cands %}
+          <tr><td><a href='{{ url_for('admin_candidate_detail', candidate_id=c.candidate_id) }}'>{{ c.first_name }} {{ c.last_name }}</a></td><td>{{ c.email }}</td><td>{{ c.role }}</td></tr>
+        {% endfor %}
+        </tbody>
+      </table>
+      {{ pager(first_url, next_url) }}
+    </div>
+{% endblock %}
+"""
+
+TEMPLATES["admin_candidate.html"] = """{% extends "layout.html" %}
+{% from "macros.html" import pager %}
+{% block body %}
+    <div class="card">
+      <h3>รายละเอียดผู้สมัคร</h3>
+      <p><strong>{{ cand.first_name }} {{ cand.last_name }}</strong> · {{ cand.email }}</p>
+      <div class="muted">เรียงตาม: 
+        <a href="{{ url_for('admin_candidate_detail', candidate_id=cand.candidate_id, sort='title') }}">ชื่อตำแหน่ง</a> · 
+        <a href="{{ url_for('admin_candidate_detail', candidate_id=cand.candidate_id, sort='company') }}">ชื่อบริษัท</a> · 
+        <a href="{{ url_for('admin_candidate_detail', candidate_id=cand.candidate_id, sort='applied_at') }}">วันที่สมัคร</a>
+      </div>
+      {% include "applications_table.html" %}
+      {{ pager(first_url, next_url) }}
+    </div>
+{% endblock %}
+"""
+
+app.jinja_loader = DictLoader(TEMPLATES)
+# part of page ETags, so copies rendered by an older version of the templates
+# are not revalidated as current
+TEMPLATES_VERSION = hashlib.sha1(repr(sorted(TEMPLATES.items())).encode("utf-8")).hexdigest()[:12]
+
+def render(template, stream=False, **ctx):
+    """Render a named template; with stream=True the page is sent in chunks
+    as it is generated (for long tables) instead of being built in memory."""
+    ctx.update(current_user=g.get("user"), is_admin=is_admin())
+    # pop flashes now: the session cookie is written before a stream starts
+    get_flashed_messages()
+    if not stream:
+        with metrics.timer(f"render.{template}"):
+            return render_template(template, **ctx)
+    app.update_template_context(ctx)
+    chunks = app.jinja_env.get_template(template).stream(ctx)
+    chunks.enable_buffering(STREAM_BUFFER_ROWS)
+    chunks = metrics.timed_iter(f"render.{template}", chunks)
+    return Response(stream_with_context(chunks), mimetype="text/html")
+
+def page_urls(next_cursor):
+    """Links to the first and the next page of the current listing"""
+    args = dict(request.view_args or {}, **request.args.to_dict())
+    args.pop("after", None)
+    first_url = url_for(request.endpoint, **args) if request.args.get("after") else None
+    next_url = url_for(request.endpoint, after=next_cursor, **args) if next_cursor else None
+    return {"first_url": first_url, "next_url": next_url}
+
+# ---------- HTTP caching for /jobs ----------
+# The open-jobs table only changes with jobs.csv/companies.csv or the date, so
+# the rendered fragment is shared by every user, keyed by query string and data
+# version.  The full page carries an ETag/Last-Modified built from the same
+# inputs (plus the user and, for admins, applications.csv) so repeat visits get
+# a 304 without rendering anything.
+JOB_TABLE_CACHE_SIZE = 256
+_job_tables = OrderedDict()
+_job_tables_lock = threading.Lock()
+
+def job_table_html(version) -> Markup:
+    key = (request.query_string, version)
+    with _job_tables_lock:
+        html = _job_tables.get(key)
+        if html is not None:
+            _job_tables.move_to_end(key)
+            return html
+    sort_by = request.args.get("sort","title")
+    q = controller.normalize_query(request.args.get("q"))
+    after, limit = controller.page_args(request.args)
+    if q:
+        jobs, next_cursor = controller.search_open_jobs(q, after=after, limit=limit)
+    else:
+        jobs, next_cursor = controller.page_open_jobs(sort_by, after=after, limit=limit)
+    with metrics.timer("render.jobs_table.html"):
+        html = Markup(render_template("jobs_table.html", jobs=jobs, q=q,
+                                      companies=controller.company_names(),
+                                      **page_urls(next_cursor)))
+    with _job_tables_lock:
+        _job_tables[key] = html
+        while len(_job_tables) > JOB_TABLE_CACHE_SIZE:
+            _job_tables.popitem(last=False)
+    return html
+
+def not_modified(etag, last_modified):
+    """304 response if the client's copy is current, else None."""
+    if session.get("_flashes"):
+        return None  # a pending flash message must be shown
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    resp = Response(status=304)
+    set_cache_headers(resp, etag, last_modified)
+    return resp
+
+def set_cache_headers(resp, etag, last_modified):
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    # per-user page (greeting, admin block): private, always revalidate
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.vary.add("Cookie")
+    return resp
 
 # ---------- Auth helpers ----------
+def is_admin():
+    user = g.get("user")
+    return bool(user) and user.get("role","").upper() == "ADMIN"
+
 def require_login():
-    if "user" not in session:
+    if g.get("user") is None:
         return redirect(url_for("login"))
     return None
 
@@ -70,18 +342,57 @@ def require_admin():
     redir = require_login()
     if redir: 
         return redir
-    if session["user"]["role"].upper() != "ADMIN":
+    if not is_admin():
         flash("ต้องเป็นแอดมินเท่านั้น")
         return redirect(url_for("jobs"))
     return None
 
+# ---------- Instrumentation ----------
+@app.before_request
+def _start_metrics():
+    g.metrics = metrics.start_request()
+
+@app.after_request
+def _finish_metrics(resp):
+    state = g.pop("metrics", None)
+    if state is not None:
+        tally = metrics.finish_request(state, request.endpoint)
+        # function names and timings are internals: admins only
+        if tally and (metrics.SERVER_TIMING_ALL or is_admin()):
+            resp.headers["Server-Timing"] = metrics.server_timing(tally)
+    return resp
+
+@app.teardown_request
+def _abort_metrics(exc):
+    # after_request is skipped when a view raises
+    state = g.pop("metrics", None)
+    if state is not None:
+        metrics.finish_request(state, request.endpoint)
+
+# ---------- Current user ----------
+# The session cookie holds only candidate_id and role; the candidate record is
+# looked up per request through controller.current_user's LRU cache.
+@app.before_request
+def _load_user():
+    if "user" in session:
+        # cookie from before ids-only sessions: keep the login, drop the record
+        old = session.pop("user") or {}
+        session["candidate_id"] = old.get("candidate_id")
+        session["role"] = old.get("role", "")
+    g.user = None
+    candidate_id = session.get("candidate_id")
+    if candidate_id:
+        g.user = controller.current_user(candidate_id)
+        if g.user is None:
+            session.clear()  # account no longer exists
+
 # ---------- Routes ----------
 @app.route("/")
 def home():
     # default landing depends on role
-    if "user" not in session:
+    if g.user is None:
         return redirect(url_for("login"))
-    if session["user"]["role"].upper() == "ADMIN":
+    if is_admin():
         return redirect(url_for("admin_candidates"))
     return redirect(url_for("jobs"))
 
@@ -99,21 +410,12 @@ def login():
             if err:
                 flash(err)
             else:
-                session["user"] = user
+                session.clear()
+                session["candidate_id"] = user["candidate_id"]
+                session["role"] = user.get("role","")
                 flash("เข้าสู่ระบบสำเร็จ")
                 return redirect(url_for("home"))
-    body = """
-    <div class="card">
-      <h3>เข้าสู่ระบบ</h3>
-      <form method="post">
-        <label>รหัสผู้ใช้ (8 หลัก):<br><input name="candidate_id" required maxlength="8"></label><br><br>
-        <label>อีเมล:<br><input name="email" type="email" required></label><br><br>
-        <button class="btn btn-primary" type="submit">เข้าสู่ระบบ</button>
-      </form>
-      <p class="muted">* สำหรับเดโม่: ดูรายชื่อและอีเมลจากไฟล์ candidates.csv</p>
-    </div>
-    """
-    return render(body, title="Login")
+    return render("login.html", title="Login")
 
 @app.route("/logout")
 def logout():
@@ -123,66 +425,41 @@ def logout():
 
 @app.route("/jobs")
 def jobs():
-    if "user" not in session:
+    if g.user is None:
         return redirect(url_for("login"))
-    sort_by = request.args.get("sort","title")
-    jobs = controller.get_open_jobs_sorted(sort_by)
-    is_admin = session["user"]["role"].upper() == "ADMIN"
+    user = g.user
+    admin = is_admin()
+    tables = [model.JOBS_CSV, model.COMPANIES_CSV]
+    if admin:
+        tables.append(model.APPLICATIONS_CSV)
+    version = tuple(model.data_version(t) for t in tables) + (datetime.now().date(),)
+    etag = hashlib.sha1(repr((request.query_string, version, user["candidate_id"],
+                              user["role"], TEMPLATES_VERSION)).encode("utf-8")).hexdigest()
+    last_modified = model.last_modified(*tables)
+    resp = not_modified(etag, last_modified)
+    if resp is not None:
+        return resp
+    # extra block: admin can see applicant counts
+    counts = controller.admin_counts_by_job() if admin else None
+    resp = render("jobs.html", stream=admin, title="ตำแหน่งงาน",
+                  job_table=job_table_html(version[:2] + version[-1:]), counts=counts,
+                  form_key=secrets.token_urlsafe(12))
+    if not isinstance(resp, Response):
+        resp = app.make_response(resp)
+    return set_cache_headers(resp, etag, last_modified)
 
-    rows = []
-    for j in jobs:
-        comp = model.get_company(j["company_id"]) or {}
-        rows.append(f"""
-            <tr>
-              <td>{j['title']}</td>
-              <td>{comp.get('name','')}</td>
-              <td>{j['deadline']}</td>
-              <td class="right">
-                <a class="btn" href="{url_for('apply', job_id=j['job_id'])}">สมัคร</a>
-                {"<span class='pill open'>เปิดรับ</span>" if j['status'].upper()=="OPEN" else "<span class='pill closed'>ปิดรับ</span>"}
-              </td>
-            </tr>
-        """)
-    body = f"""
-    <div class="card">
-      <h3>ตำแหน่งงานที่เปิดรับ</h3>
-      <div class="muted">จัดเรียง:
-        <a href="{url_for('jobs', sort='title')}">ชื่อตำแหน่ง</a> · 
-        <a href="{url_for('jobs', sort='company')}">ชื่อบริษัท</a> · 
-        <a href="{url_for('jobs', sort='deadline')}">วันปิดรับ</a>
-      </div>
-      <table>
-        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>วันปิดรับ</th><th class="right">การทำงาน</th></tr></thead>
-        <tbody>
-          {''.join(rows)}
-        </tbody>
-      </table>
-    </div>
-    """
-    if is_admin:
-        # extra block: admin can see applicant counts
-        counts = controller.admin_counts_by_job()
-        rows2 = []
-        for r in counts:
-            pill = "<span class='pill open'>เปิดรับ</span>" if r["status"].upper()=="OPEN" else "<span class='pill closed'>ปิดรับ</span>"
-            rows2.append(f"<tr><td>{r['title']}</td><td>{r['company']}</td><td>{r['deadline']}</td><td>{pill}</td><td class='right'>{r['applicants']}</td></tr>")
-        body += f"""
-        <div class="card">
-          <h3>ภาพรวมตำแหน่งงาน (แอดมิน)</h3>
-          <table>
-            <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>ปิดรับ</th><th>สถานะ</th><th class="right">จำนวนผู้สมัคร</th></tr></thead>
-            <tbody>{''.join(rows2)}</tbody>
-          </table>
-        </div>
-        """
-    return render(body, title="ตำแหน่งงาน")
-
-@app.route("/apply/<job_id>")
+# Applying is a POST from the button on the jobs table; a GET (old links,
+# prefetchers) only goes back to the jobs page.  The buttons sit in the shared,
+# cached table and submit the page's own form, whose idempotency key is fresh
+# for every rendering of jobs.html; a resubmitted form gets its first answer.
+@app.route("/apply/<job_id>", methods=["GET","POST"])
 def apply(job_id):
     redir = require_login()
     if redir: return redir
-    user = session["user"]
-    ok, msg = controller.apply_job(job_id, user["candidate_id"])
+    if request.method != "POST":
+        return redirect(url_for("jobs"))
+    ok, msg, _ = controller.submit_application(job_id, g.user["candidate_id"],
+                                               request.form.get("idempotency_key",""))
     if ok:
         flash("สมัครงานสำเร็จ")
     else:
@@ -195,31 +472,14 @@ def my_profile():
     redir = require_login()
     if redir: return redir
     sort_by = request.args.get("sort","title")
-    cand, apps, err = controller.candidate_profile(session["user"]["candidate_id"], sort_by=sort_by)
+    after, limit = controller.page_args(request.args)
+    cand, apps, next_cursor, err = controller.candidate_profile_page(
+        g.user["candidate_id"], sort_by=sort_by, after=after, limit=limit)
     if err:
         flash(err)
         return redirect(url_for("jobs"))
-    rows = []
-    for a in apps:
-        job = model.get_job(a["job_id"]) or {}
-        comp = model.get_company(job.get("company_id","")) or {}
-        rows.append(f"<tr><td>{job.get('title','')}</td><td>{comp.get('name','')}</td><td>{a.get('applied_at','')}</td></tr>")
-    body = f"""
-    <div class="card">
-      <h3>ประวัติผู้สมัคร: {cand['first_name']} {cand['last_name']}</h3>
-      <p class="muted">อีเมล: {cand['email']}</p>
-      <div class="muted">เรียงตาม: 
-        <a href="{url_for('my_profile', sort='title')}">ชื่อตำแหน่ง</a> · 
-        <a href="{url_for('my_profile', sort='company')}">ชื่อบริษัท</a> · 
-        <a href="{url_for('my_profile', sort='applied_at')}">วันที่สมัคร</a>
-      </div>
-      <table>
-        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>วันที่สมัคร</th></tr></thead>
-        <tbody>{''.join(rows)}</tbody>
-      </table>
-    </div>
-    """
-    return render(body, title="ประวัติของฉัน")
+    return render("profile.html", title="ประวัติของฉัน", cand=cand, apps=apps,
+                  **page_urls(next_cursor))
 
 # ---------- Admin views ----------
 @app.route("/admin/candidates")
@@ -227,52 +487,88 @@ def admin_candidates():
     redir = require_admin()
     if redir: return redir
     sort_by = request.args.get("sort","first_name")
-    cands = controller.sort_candidates(model.list_candidates(), by=sort_by)
-    rows = []
-    for c in cands:
-        rows.append(f"<tr><td><a href='{url_for('admin_candidate_detail', candidate_id=c['candidate_id'])}'>{c['first_name']} {c['last_name']}</a></td><td>{c['email']}</td><td>{c['role']}</td></tr>")
-    body = f"""
-    <div class="card">
-      <h3>ผู้สมัครทั้งหมด (เรียงตามชื่อ)</h3>
-      <table>
-        <thead><tr><th>ชื่อ-นามสกุล</th><th>อีเมล</th><th>สิทธิ์</th></tr></thead>
-        <tbody>{''.join(rows)}</tbody>
-      </table>
-    </div>
-    """
-    return render(body, title="ผู้สมัครทั้งหมด")
+    after, limit = controller.page_args(request.args)
+    cands, next_cursor = controller.page_candidates(sort_by, after=after, limit=limit)
+    return render("admin_candidates.html", stream=True, title="ผู้สมัครทั้งหมด", cands=cands,
+                  **page_urls(next_cursor))
 
 @app.route("/admin/candidate/<candidate_id>")
 def admin_candidate_detail(candidate_id):
     redir = require_admin()
     if redir: return redir
     sort_by = request.args.get("sort","title")
-    cand, apps, err = controller.candidate_profile(candidate_id, sort_by=sort_by)
+    after, limit = controller.page_args(request.args)
+    cand, apps, next_cursor, err = controller.candidate_profile_page(
+        candidate_id, sort_by=sort_by, after=after, limit=limit)
     if err:
         flash(err)
         return redirect(url_for("admin_candidates"))
-    rows = []
-    for a in apps:
-        job = model.get_job(a["job_id"]) or {}
-        comp = model.get_company(job.get("company_id","")) or {}
-        rows.append(f"<tr><td>{job.get('title','')}</td><td>{comp.get('name','')}</td><td>{a.get('applied_at','')}</td></tr>")
-    body = f"""
-    <div class="card">
-      <h3>รายละเอียดผู้สมัคร</h3>
-      <p><strong>{cand['first_name']} {cand['last_name']}</strong> · {cand['email']}</p>
-      <div class="muted">เรียงตาม: 
-        <a href="{url_for('admin_candidate_detail', candidate_id=cand['candidate_id'], sort='title')}">ชื่อตำแหน่ง</a> · 
-        <a href="{url_for('admin_candidate_detail', candidate_id=cand['candidate_id'], sort='company')}">ชื่อบริษัท</a> · 
-        <a href="{url_for('admin_candidate_detail', candidate_id=cand['candidate_id'], sort='applied_at')}">วันที่สมัคร</a>
-      </div>
-      <table>
-        <thead><tr><th>ตำแหน่ง</th><th>บริษัท</th><th>วันที่สมัคร</th></tr></thead>
-        <tbody>{''.join(rows)}</tbody>
-      </table>
-    </div>
-    """
-    return render(body, title="รายละเอียดผู้สมัคร")
+    return render("admin_candidate.html", title="รายละเอียดผู้สมัคร", cand=cand, apps=apps,
+                  **page_urls(next_cursor))
+
+# ---------- Exports ----------
+def csv_chunks(header, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Encode rows as CSV, yielding one bytes chunk per chunk_rows rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM, so spreadsheet apps read Thai text as UTF-8
+    writer.writerow(header)
+    for n, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if n % chunk_rows == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+def jsonl_chunks(header, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Encode rows as JSON lines (one object per row), chunked like csv_chunks."""
+    lines = []
+    for row in rows:
+        lines.append(api.dumps(dict(zip(header, row))))
+        if len(lines) == chunk_rows:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+def date_arg(name):
+    """Optional YYYY-MM-DD query parameter as a date (ValueError if malformed)."""
+    raw = request.args.get(name, "").strip()
+    return date.fromisoformat(raw) if raw else None
+
+@app.route("/admin/export/applications")
+def admin_export_applications():
+    redir = require_admin()
+    if redir: return redir
+    try:
+        since, until = date_arg("since"), date_arg("until")
+    except ValueError:
+        flash("วันที่ต้องอยู่ในรูปแบบ YYYY-MM-DD")
+        return redirect(url_for("jobs"))
+    rows = controller.export_applications(
+        job_id=request.args.get("job_id","").strip() or None,
+        company_id=request.args.get("company_id","").strip() or None,
+        since=since, until=until)
+    if request.args.get("format") == "jsonl":
+        chunks, mimetype, ext = jsonl_chunks(controller.EXPORT_COLUMNS, rows), "application/x-ndjson", "jsonl"
+    else:
+        chunks, mimetype, ext = csv_chunks(controller.EXPORT_COLUMNS, rows), "text/csv", "csv"
+    chunks = metrics.timed_iter("export.applications", chunks)
+    resp = Response(stream_with_context(chunks), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="applications-{date.today():%Y%m%d}.{ext}"'
+    return resp
+
+@app.route("/admin/metrics")
+def admin_metrics():
+    redir = require_admin()
+    if redir: return redir
+    return Response(metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
+    # flip expired jobs to CLOSED at each day boundary (see scheduler.py); with
+    # the reloader this block also runs in its parent, which serves nothing
+    if scheduler.enabled() and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        scheduler.start_background()
     # Run dev server
     app.run(host="0.0.0.0", port=5000, debug=True)